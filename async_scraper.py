@@ -0,0 +1,372 @@
+"""
+Asyncio engine for the scraper, built on Playwright's async API.
+
+One browser is shared by every request on the server's event loop. Each run gets its
+own browser context (cookies, login) and scrapes its projects concurrently on up to
+`max_pages` pages; images download through the context's request API while other
+pages are still navigating.
+
+This is the only scraping implementation: realty_scraper.run (generate.py, the CLI,
+bench_scraper) is a synchronous wrapper that runs one engine on its own event loop.
+"""
+from playwright.async_api import async_playwright
+import asyncio
+import os
+import time
+
+import image_pipeline
+import realty_scraper
+from realty_scraper import (
+    sanitize_filename, is_public_nawy_url, is_public_gallery_image, is_erealty_gallery_image,
+    master_plan_filename, gallery_filename, prepare_project_dir, build_record, slim_record,
+    record_stage, record_count, record_sample,
+)
+from metadata_sink import ProjectSink, sink_path
+
+
+class AsyncScraperEngine:
+    def __init__(self, max_pages=4, max_downloads=8, headless=True, generate_variants=None):
+        """
+        max_pages: Pages navigating/extracting at the same time, across all runs.
+        max_downloads: Image downloads in flight at the same time, across all runs.
+        generate_variants: Make WebP variants of every downloaded image (image_pipeline);
+                           None follows realty_scraper.GENERATE_VARIANTS.
+        """
+        self.max_pages = max_pages
+        self.max_downloads = max_downloads
+        self.headless = headless
+        self.generate_variants = generate_variants
+        self._playwright = None
+        self._browser = None
+        self._sink = None
+        self._image_pool = None
+        self._start_lock = asyncio.Lock()
+        self._pages = asyncio.Semaphore(max_pages)
+        self._downloads = asyncio.Semaphore(max_downloads)
+
+    async def start(self):
+        """Launches the shared browser (again, if it crashed). Safe to call on every request."""
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            if self._sink is None:
+                self._sink = ProjectSink(sink_path(realty_scraper.OUTPUT_DIR))
+            generate_variants = (realty_scraper.GENERATE_VARIANTS if self.generate_variants is None
+                                 else self.generate_variants)
+            if self._image_pool is None and generate_variants:
+                self._image_pool = image_pipeline.start_pool()
+            print("Async scraper engine started.")
+
+    async def stop(self):
+        async with self._start_lock:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+            if self._image_pool is not None:
+                self._image_pool.shutdown()
+                self._image_pool = None
+
+    async def run(self, target_url=None, stats=None):
+        """Async counterpart of realty_scraper.run; returns the same list of project records."""
+        await self.start()
+        # Held for the whole run: stop() may clear self._sink while projects are in flight,
+        # and appending to the closed sink is then reported per project
+        sink = self._sink
+        context = await self._browser.new_context()
+        try:
+            # 2. Determine Scope & Actions
+            if target_url and is_public_nawy_url(target_url):
+                print(f"Targeting public Nawy Page: {target_url}")
+                project_links = [target_url]
+            elif target_url:
+                print(f"Targeting single URL (E-Realty): {target_url}")
+                page = await context.new_page()
+                start = time.perf_counter()
+                await login(page)
+                record_stage(stats, 'login', start)
+                await page.close()
+                project_links = [target_url]
+            else:
+                project_links = await self._list_projects(context, stats)
+
+            # 3. Scrape Projects (concurrently, bounded by the page semaphore)
+            results = await asyncio.gather(*(self._scrape_project(context, link, stats, sink) for link in project_links))
+            return [record for record in results if record is not None]
+        finally:
+            await context.close()
+
+    async def _list_projects(self, context, stats):
+        """Full E-Realty scrape: login and collect every project link."""
+        page = await context.new_page()
+        try:
+            start = time.perf_counter()
+            await login(page)
+            record_stage(stats, 'login', start)
+
+            start = time.perf_counter()
+            print("Navigating to E-Realty...")
+            await page.goto(realty_scraper.EREALTY_URL)
+            try:
+                await page.wait_for_selector("a.MuiStack-root.css-pgkduz", timeout=15000)
+            except Exception:
+                print("Timeout waiting for projects. Reloading...")
+                await page.reload()
+                await page.wait_for_selector("a.MuiStack-root.css-pgkduz", timeout=15000)
+
+            print("Loading projects...")
+            # Scroll down a few times to load more
+            for _ in range(5):
+                await page.mouse.wheel(0, 1000)
+                await asyncio.sleep(1)
+
+            project_cards = await page.query_selector_all("a.MuiStack-root.css-pgkduz")
+            print(f"Found {len(project_cards)} projects.")
+
+            project_links = []
+            for card in project_cards:
+                href = await card.get_attribute("href")
+                if href:
+                    project_links.append(href if href.startswith("http") else f"https://erealty.nawy.com{href}")
+            record_stage(stats, 'listing', start)
+            return project_links
+        finally:
+            await page.close()
+
+    async def _scrape_project(self, context, link, stats, sink):
+        try:
+            # Navigation and extraction hold a page slot; downloads run after the page is released
+            async with self._pages:
+                page = await context.new_page()
+                try:
+                    print(f"Scraping: {link}")
+                    start = time.perf_counter()
+                    response = await page.goto(link)
+                    if response is not None and response.request.timing.get('responseStart', -1) >= 0:
+                        record_sample(stats, 'page_ttfb', response.request.timing['responseStart'] / 1000)
+
+                    if is_public_nawy_url(link):
+                        await page.wait_for_selector("div#entity-data", timeout=20000)
+                        record_stage(stats, 'navigate', start)
+                        start = time.perf_counter()
+                        project_name, description, master_plan_url, image_urls = await extract_public_page(page)
+                    else:
+                        await page.wait_for_selector("div.MuiStack-root.css-5t4gzz", timeout=10000)
+                        record_stage(stats, 'navigate', start)
+                        start = time.perf_counter()
+                        project_name, description, master_plan_url, image_urls = await extract_erealty_page(page)
+                    record_stage(stats, 'extract', start)
+                finally:
+                    await page.close()
+
+            start = time.perf_counter()
+            safe_name = sanitize_filename(project_name)
+            project_dir, desc_path = await asyncio.to_thread(prepare_project_dir, safe_name, description)
+
+            # Master plan and gallery download concurrently
+            mp_task = None
+            if master_plan_url:
+                mp_task = self._download(context, master_plan_url,
+                                         os.path.join(project_dir, master_plan_filename(master_plan_url)), stats)
+            gallery_tasks = [
+                self._download(context, img_url, os.path.join(project_dir, gallery_filename(img_url, i + 1)), stats)
+                for i, img_url in enumerate(image_urls)
+            ]
+            results = await asyncio.gather(*([mp_task] if mp_task else []), *gallery_tasks)
+            mp_path = results[0] if mp_task else None
+            gallery_paths = [path for path in results[1 if mp_task else 0:] if path]
+            record_stage(stats, 'download', start)
+            record_count(stats, 'pages')
+
+            record = build_record(project_name, link, description, desc_path, len(image_urls),
+                                  master_plan_url, mp_path, gallery_paths, project_dir)
+            if self._image_pool is not None:
+                start = time.perf_counter()
+                loop = asyncio.get_running_loop()
+                results = await asyncio.gather(*(loop.run_in_executor(self._image_pool, image_pipeline.make_variants, path)
+                                                 for path in image_pipeline.project_images(record)))
+                image_pipeline.attach_variants(record, results)
+                record_stage(stats, 'variants', start)
+            # Write, flush and the periodic fsync stay off the event loop
+            await asyncio.to_thread(sink.append, record)
+            return slim_record(record)
+
+        except Exception as e:
+            print(f"Failed to scrape project {link}: {e}")
+            return None
+
+    async def _download(self, context, url, path, stats):
+        """Downloads url to path through the browser context. Returns path, or None on failure."""
+        async with self._downloads:
+            try:
+                response = await context.request.get(url)
+                if response.status != 200:
+                    return None
+                body = await response.body()
+            except Exception as e:
+                print(f"Failed to download image: {e}")
+                return None
+        await asyncio.to_thread(_write_bytes, path, body)
+        record_count(stats, 'images')
+        record_count(stats, 'image_bytes', len(body))
+        return path
+
+
+def _write_bytes(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+async def login(page):
+    print("Logging in...")
+    try:
+        # Go to home and click Login
+        await page.goto(realty_scraper.NAWY_HOME)
+        await page.get_by_role("button", name="Login").click()
+
+        # Now fill credentials
+        await page.fill("input[placeholder='Enter your Phone number']", realty_scraper.USERNAME)
+        await page.fill("input[placeholder='Enter your password']", realty_scraper.PASSWORD)
+        # Use specific text selector to avoid background buttons
+        await page.click("button:has-text('Log In')")
+
+        # Wait for login to complete (check for dashboard element or URL change)
+        await page.wait_for_url("**/landing/**", timeout=20000)
+        print("Login successful.")
+    except Exception as e:
+        print(f"Login failed: {e}")
+        await page.screenshot(path="debug_login_fail.png")
+        raise e
+
+
+async def extract_public_page(page):
+    """Public Nawy page. Returns (project_name, description, master_plan_url, image_urls)."""
+    # 1. Project Name
+    try:
+        project_name = (await page.title()).split('-')[0].strip()
+        # Fallback to header if title is generic
+        if not project_name or "Nawy" in project_name:
+            header = await page.query_selector("h1")
+            if header: project_name = (await header.inner_text()).strip()
+    except Exception:
+        project_name = "Untitled_Project"
+    print(f"Project Name: {project_name}")
+
+    # 2. Description
+    description = ""
+    try:
+        description_container = await page.query_selector("div#head div.description")
+        if description_container:
+            description = (await description_container.inner_text()).strip()
+
+        if not description:
+            # Fallback: header matching "About" or "عن", then its sibling/parent text
+            about_header = await page.query_selector("h2:has-text('عن'), h2:has-text('About')")
+            if about_header:
+                container = await about_header.query_selector("xpath=..")
+                if container:
+                    desc_sibling = await container.query_selector(".description")
+                    if desc_sibling:
+                        description = (await desc_sibling.inner_text()).strip()
+                    else:
+                        texts = [await p.inner_text() for p in await container.query_selector_all("p")]
+                        description = "\n".join([t for t in texts if len(t) > 50])
+
+        if not description:
+            # Final Fallback: any paragraph with substantial text
+            texts = [await p.inner_text() for p in await page.query_selector_all("div#entity-data p")]
+            description = "\n".join([t for t in texts if len(t) > 100])
+    except Exception as e:
+        print(f"Error extracting description: {e}")
+
+    image_urls = set()
+    master_plan_url = None
+
+    # 3. Master Plan
+    try:
+        project_plan_tab = None
+        for tab in await page.query_selector_all("div, span, li, a"):
+            text = await tab.inner_text()
+            if "مخطط المشروع" in text or "Project Plan" in text:
+                project_plan_tab = tab
+                break
+
+        if project_plan_tab:
+            print("Found Master Plan tab, clicking...")
+            await project_plan_tab.click()
+            await asyncio.sleep(2)  # Wait for tab switch
+
+            for img in await page.query_selector_all("div#entity-data img"):
+                src = await img.get_attribute("src")
+                if src:
+                    master_plan_url = src
+                    break  # Take the first one found in the content area
+
+        if not master_plan_url:
+            # Fallback: Check if any image has 'master plan' or 'مخطط' in alt
+            for img in await page.query_selector_all("img"):
+                alt = await img.get_attribute("alt") or ""
+                if "مخطط" in alt or "master" in alt.lower():
+                    master_plan_url = await img.get_attribute("src")
+                    break
+    except Exception as e:
+        print(f"Error iterating master plan: {e}")
+
+    # 4. Project Photos (Gallery)
+    try:
+        gallery_imgs = await page.query_selector_all("div#__next > div > div:nth-of-type(5) img")
+        if not gallery_imgs:
+            gallery_imgs = await page.query_selector_all("img[src*='images.nawy.com']")
+
+        for img in gallery_imgs:
+            src = await img.get_attribute("src")
+            if src and is_public_gallery_image(src, master_plan_url):
+                image_urls.add(src)
+    except Exception as e:
+        print(f"Error extracting gallery: {e}")
+
+    return project_name, description, master_plan_url, image_urls
+
+
+async def extract_erealty_page(page):
+    """E-Realty project page. Returns (project_name, description, master_plan_url, image_urls)."""
+    try:
+        project_name = (await page.inner_text("h1, h2")).split('\n')[0]
+    except Exception:
+        project_name = "Untitled_Project"
+    print(f"Project Name: {project_name}")
+
+    description = ""
+    try:
+        desc_elements = await page.query_selector_all(
+            "div.MuiStack-root.css-5t4gzz p, div.MuiStack-root.css-5t4gzz .MuiTypography-root")
+        texts = [await el.inner_text() for el in desc_elements]
+        description = "\n".join([t for t in texts if len(t) > 20])
+    except Exception as e:
+        print(f"Error extracting description: {e}")
+
+    image_urls = set()
+    master_plan_url = None  # E-Realty doesn't seem to split this well yet, treated as normal photo
+    try:
+        imgs = await page.query_selector_all("img[src*='/gallery/']")
+        if not imgs:
+            imgs = await page.query_selector_all("img[src*='compound_image']")
+        if not imgs:
+            imgs = await page.query_selector_all(".MuiBox-root.css-1ml5yzj img")
+
+        for img in imgs:
+            src = await img.get_attribute("src")
+            if src and is_erealty_gallery_image(src):
+                image_urls.add(src)
+    except Exception as e:
+        print(f"Error extracting images: {e}")
+
+    return project_name, description, master_plan_url, image_urls
@@ -0,0 +1,215 @@
+"""
+Reproducible benchmark suite for processor.process_excel_file.
+
+Generates synthetic workbooks (cached by parameters and seed), runs each case in a
+fresh process and records wall time per stage (read, map, group, write, zip), peak RSS
+and output bytes as JSON, so results can be compared between commits.
+
+Usage:
+    python bench_processor.py                              # default matrix
+    python bench_processor.py --rows 1000 100000 1000000   # custom row counts
+    python bench_processor.py --compare old.json new.json  # regression report
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from processor import MAPPING_RULES, PROJECT_COL_CANDIDATES
+
+CACHE_DIR = ".bench_cache"
+RESULTS_DIR = "benchmark_results"
+STAGES = ["read", "map", "group", "write", "zip"]
+
+
+def make_frame(rows, extra_cols, projects, sizes, alias, seed=0):
+    """
+    Builds a synthetic developer export.
+
+    alias: Index into each header's alias list in MAPPING_RULES / PROJECT_COL_CANDIDATES,
+           so different spellings of the same headers are exercised.
+    """
+    rng = np.random.default_rng(seed)
+
+    def header(target):
+        candidates = MAPPING_RULES[target]
+        return candidates[alias % len(candidates)]
+
+    project_names = np.array([f"Project {i}" for i in range(projects)], dtype=object)
+    size_values = np.arange(sizes) * 7 + 60
+    data = {
+        PROJECT_COL_CANDIDATES[alias % len(PROJECT_COL_CANDIDATES)]: project_names[rng.integers(0, projects, rows)],
+        header('code'): np.arange(rows) + 100000,
+        header('sale_type'): rng.choice(np.array(['Primary', 'Resale'], dtype=object), rows),
+        header('size'): size_values[rng.integers(0, sizes, rows)],
+        header('beds_no'): rng.integers(1, 6, rows),
+        header('baths_no'): rng.integers(1, 5, rows),
+        header('Floor Number'): rng.integers(0, 25, rows),
+        header('badget'): rng.integers(1_000_000, 30_000_000, rows),
+    }
+    for i in range(extra_cols):
+        data[f"Extra {i}"] = rng.random(rows)
+    return pd.DataFrame(data)
+
+
+def workbook_path(rows, extra_cols, projects, sizes, alias, seed):
+    """Returns the cached synthetic workbook for these parameters, generating it if needed."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"r{rows}_c{extra_cols}_p{projects}_s{sizes}_a{alias}_seed{seed}.xlsx")
+    if not os.path.exists(path):
+        print(f"Generating {path}...")
+        tmp_path = path + ".tmp.xlsx"
+        make_frame(rows, extra_cols, projects, sizes, alias, seed).to_excel(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    return path
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(input_path):
+    """Runs one case in the current (fresh) process and returns its measurements."""
+    # Imported here so the import cost is not counted in the parent
+    import contextlib
+    import io
+    from processor import process_excel_file, zip_files
+
+    timings = {}
+    out_dir = tempfile.mkdtemp(prefix="bench_out_")
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            success, files = process_excel_file(input_path, out_dir, timings)
+            if not success:
+                raise RuntimeError(f"process_excel_file failed on {input_path}")
+            zip_path = zip_files(files, os.path.join(out_dir, "bundle.zip"), timings)
+        wall = time.perf_counter() - start
+
+        return {
+            "wall_seconds": round(wall, 4),
+            "stages": {stage: round(timings.get(stage, 0.0), 4) for stage in STAGES},
+            "peak_rss_bytes": peak_rss_bytes(),
+            "output_files": len(files),
+            "output_bytes": sum(os.path.getsize(f) for f in files),
+            "zip_bytes": os.path.getsize(zip_path),
+        }
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(args):
+    spawn = multiprocessing.get_context("spawn")
+    cases = []
+    matrix = itertools.product(args.rows, args.extra_cols, args.projects, args.sizes, args.aliases)
+    for rows, extra_cols, projects, sizes, alias in matrix:
+        params = {"rows": rows, "columns": 8 + extra_cols, "projects": projects, "sizes": sizes, "alias": alias}
+        case_id = ",".join(f"{k}={v}" for k, v in params.items())
+        input_path = workbook_path(rows, extra_cols, projects, sizes, alias, args.seed)
+
+        runs = []
+        for _ in range(args.repeat):
+            # A fresh process per run keeps peak RSS and caches independent between cases
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                runs.append(pool.submit(run_case, input_path).result())
+        best = min(runs, key=lambda r: r["wall_seconds"])
+        best["wall_seconds_all"] = [r["wall_seconds"] for r in runs]
+
+        print(f"{case_id}: {best['wall_seconds']:.3f}s, "
+              f"peak RSS {best['peak_rss_bytes'] / 2**20:.1f} MiB, {best['output_files']} files")
+        cases.append({"case": case_id, "params": params, "input_bytes": os.path.getsize(input_path), **best})
+
+    revision = git_revision()
+    results = {
+        "meta": {
+            "revision": revision,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "cases": cases,
+    }
+
+    out_path = args.out or os.path.join(RESULTS_DIR, f"processor-{revision}.json")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved results to {out_path}")
+
+
+def compare(old_path, new_path, threshold):
+    """Prints per-case changes between two result files. Returns True if anything regressed."""
+    with open(old_path, encoding="utf-8") as f:
+        old = {c["case"]: c for c in json.load(f)["cases"]}
+    with open(new_path, encoding="utf-8") as f:
+        new = {c["case"]: c for c in json.load(f)["cases"]}
+
+    regressed = False
+    for case_id, cur in new.items():
+        base = old.get(case_id)
+        if base is None:
+            print(f"{case_id}: new case")
+            continue
+        parts = []
+        for label, key in (("wall", "wall_seconds"), ("rss", "peak_rss_bytes"), ("out", "output_bytes")):
+            ratio = cur[key] / base[key] if base[key] else 1.0
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = " REGRESSION"
+                regressed = True
+            parts.append(f"{label} {ratio:.2f}x{flag}")
+        stage_parts = [f"{s} {base['stages'][s]:.3f}->{cur['stages'][s]:.3f}s" for s in STAGES]
+        print(f"{case_id}: " + ", ".join(parts))
+        print("    " + ", ".join(stage_parts))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark processor.process_excel_file")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--extra-cols", type=int, nargs="+", default=[2, 20],
+                        help="Unmapped columns added next to the 8 mapped ones")
+    parser.add_argument("--projects", type=int, nargs="+", default=[5, 200])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10])
+    parser.add_argument("--aliases", type=int, nargs="+", default=[0, 1],
+                        help="Header alias variant index into MAPPING_RULES")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--out", help=f"Results file (default: {RESULTS_DIR}/processor-<revision>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown reported as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(args.compare[0], args.compare[1], args.threshold) else 0)
+    run_suite(args)
+
+
+if __name__ == "__main__":
+    main()
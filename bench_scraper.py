@@ -0,0 +1,157 @@
+"""
+Offline benchmark for realty_scraper.run (or the async engine) against the local fixture site (scraper_fixture.py).
+
+Reports pages/min, images/s, page time to first byte and a per-stage
+breakdown (launch, login, listing, navigate, extract, download, variants), and saves the results
+as JSON next to the processor benchmarks.
+
+Usage:
+    python bench_scraper.py --mode erealty --projects 10 --images 20
+    python bench_scraper.py --mode public --latency-ms 80 --bandwidth 1000000
+    python bench_scraper.py --engine async --mode public --projects 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import realty_scraper
+from bench_processor import RESULTS_DIR, git_revision
+from scraper_fixture import ScraperFixture, FIXTURE_USERNAME, FIXTURE_PASSWORD
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(stats, wall):
+    pages = stats.get('pages', 0)
+    images = stats.get('images', 0)
+    download_seconds = stats.get('stages', {}).get('download', 0.0)
+    summary = {
+        "wall_seconds": round(wall, 3),
+        "pages": pages,
+        "images": images,
+        "image_bytes": stats.get('image_bytes', 0),
+        "pages_per_min": round(pages / wall * 60, 2) if wall else None,
+        "images_per_sec": round(images / wall, 2) if wall else None,
+        "images_per_download_sec": round(images / download_seconds, 2) if download_seconds else None,
+        "stages": {stage: round(seconds, 3) for stage, seconds in stats.get('stages', {}).items()},
+    }
+    for key in ("page_ttfb",):
+        samples = stats.get(key, [])
+        summary[key] = {
+            "median": round(statistics.median(samples), 4) if samples else None,
+            "p95": round(percentile(samples, 0.95), 4) if samples else None,
+            "samples": len(samples),
+        }
+    return summary
+
+
+async def run_async_benchmark(fixture, mode, projects, stats):
+    """Same workload on async_scraper; public pages are requested concurrently, like parallel server calls."""
+    import async_scraper
+
+    engine = async_scraper.AsyncScraperEngine()
+    await engine.start()
+    try:
+        if mode == "erealty":
+            await engine.run(stats=stats)
+        else:
+            await asyncio.gather(*(engine.run(fixture.public_url(index), stats=stats)
+                                   for index in range(1, projects + 1)))
+    finally:
+        await engine.stop()
+
+
+def run_benchmark(fixture, mode, projects, engine="sync"):
+    """Drives the scraper against the fixture and returns (stats, wall_seconds)."""
+    stats = {}
+    start = time.perf_counter()
+    if engine == "async":
+        asyncio.run(run_async_benchmark(fixture, mode, projects, stats))
+    elif mode == "erealty":
+        # Full crawl: login, project listing, every project page
+        realty_scraper.run(stats=stats)
+    else:
+        # One public compound page per call, like the server's /download-project
+        for index in range(1, projects + 1):
+            realty_scraper.run(fixture.public_url(index), stats=stats)
+    return stats, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark realty_scraper.run against the local fixture site")
+    parser.add_argument("--mode", choices=["public", "erealty"], default="erealty")
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync",
+                        help="sync: one realty_scraper.run (own browser) per call; "
+                             "async: one shared AsyncScraperEngine, public pages requested concurrently")
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--images", type=int, default=12, help="Gallery images per project")
+    parser.add_argument("--image-size", default="800x600", help="WIDTHxHEIGHT of generated images")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--bandwidth", type=int, default=0, help="Bytes per second per response (0 = unlimited)")
+    parser.add_argument("--out", help=f"Results file (default: {RESULTS_DIR}/scraper-<revision>.json)")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.image_size.split("x"))
+    output_dir = tempfile.mkdtemp(prefix="bench_scrape_")
+
+    with ScraperFixture(projects=args.projects, images_per_project=args.images, image_size=(width, height),
+                        latency_ms=args.latency_ms, bandwidth=args.bandwidth) as fixture:
+        # Point the scraper at the fixture instead of the live Nawy sites
+        realty_scraper.NAWY_HOME = fixture.nawy_home
+        realty_scraper.LOGIN_URL = fixture.nawy_home
+        realty_scraper.EREALTY_URL = fixture.erealty_url
+        realty_scraper.USERNAME = FIXTURE_USERNAME
+        realty_scraper.PASSWORD = FIXTURE_PASSWORD
+        realty_scraper.OUTPUT_DIR = output_dir
+
+        try:
+            stats, wall = run_benchmark(fixture, args.mode, args.projects, args.engine)
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+        summary = summarize(stats, wall)
+        summary["fixture_bytes_sent"] = fixture.bytes_sent
+        summary["fixture_requests"] = fixture.request_count
+
+    revision = git_revision()
+    results = {
+        "meta": {
+            "revision": revision,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "mode": args.mode,
+            "engine": args.engine,
+            "projects": args.projects,
+            "images_per_project": args.images,
+            "image_size": args.image_size,
+            "latency_ms": args.latency_ms,
+            "bandwidth": args.bandwidth,
+        },
+        "results": summary,
+    }
+
+    print(f"{summary['pages']} pages in {summary['wall_seconds']}s "
+          f"({summary['pages_per_min']} pages/min, {summary['images_per_sec']} images/s)")
+    print(f"Page TTFB median {summary['page_ttfb']['median']}s")
+    for stage, seconds in summary["stages"].items():
+        print(f"  {stage:<10} {seconds:.3f}s")
+
+    prefix = "scraper" if args.engine == "sync" else f"scraper-{args.engine}"
+    out_path = args.out or os.path.join(RESULTS_DIR, f"{prefix}-{revision}.json")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved results to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,57 @@
 from googleapiclient.discovery import build
+from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload, MediaFileUpload, build_http
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload
+from google_auth_httplib2 import AuthorizedHttp
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import io
+import json
 import pickle
 import os
+import threading
 
 # Scope for reading and writing files
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Resumable upload chunks must be a multiple of 256 KB
+UPLOAD_CHUNK_SIZE = 4 * 256 * 1024
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Local record of what was last downloaded from Drive, kept inside the cache directory
+MANIFEST_NAME = '.drive_manifest.json'
+
 class DriveClient:
-    def __init__(self, credentials_path='credentials.json', token_path='token.pickle'):
+    def __init__(self, credentials_path='credentials.json', token_path='token.pickle',
+                 max_workers=4, num_retries=5, http_factory=None):
+        """
+        max_workers: Number of files transferred concurrently by the folder-sync methods.
+        num_retries: Retries (with exponential backoff) for 5xx/429 responses per request.
+        http_factory: Optional callable returning an httplib2.Http-like object. When set,
+                      OAuth is skipped and every request goes through that object
+                      (used to run against a local stand-in server, see drive_stub.py).
+        """
         self.creds = None
         self.service = None
         self.credentials_path = credentials_path
         self.token_path = token_path
-        
+        self.max_workers = max_workers
+        self.num_retries = num_retries
+        self.http_factory = http_factory
+        self._local = threading.local()
+
     def authenticate(self):
         """Authenticates the user using OAuth2."""
+        if self.http_factory:
+            self.service = self._build_service()
+            self._local.service = self.service
+            return
+
         if os.path.exists(self.token_path):
             with open(self.token_path, 'rb') as token:
                 self.creds = pickle.load(token)
-                
+
         # If there are no (valid) credentials available, let the user log in.
         if not self.creds or not self.creds.valid:
             if self.creds and self.creds.expired and self.creds.refresh_token:
@@ -29,46 +59,310 @@ class DriveClient:
             else:
                 if not os.path.exists(self.credentials_path):
                     raise FileNotFoundError(f"Could not find {self.credentials_path}. You receive this file from Google Cloud Console.")
-                
+
                 flow = InstalledAppFlow.from_client_secrets_file(
                     self.credentials_path, SCOPES)
                 self.creds = flow.run_local_server(port=0)
-                
+
             # Save the credentials for the next run
             with open(self.token_path, 'wb') as token:
                 pickle.dump(self.creds, token)
 
-        self.service = build('drive', 'v3', credentials=self.creds)
+        self.service = self._build_service()
+        self._local.service = self.service
+
+    def _build_service(self):
+        if self.http_factory:
+            http = self.http_factory()
+        else:
+            http = AuthorizedHttp(self.creds, http=build_http())
+        return build('drive', 'v3', http=http, cache_discovery=False)
+
+    def _thread_service(self):
+        """
+        Returns a service object owned by the calling thread.
+        httplib2 connections are not thread-safe, so each worker gets its own.
+        """
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self._build_service()
+            self._local.service = service
+        return service
 
     def list_files_in_folder(self, folder_id):
-        """Lists files in a specific Google Drive folder."""
-        results = self.service.files().list(
+        """Lists files in a specific Google Drive folder, following every result page."""
+        files = self._thread_service().files()
+        request = files.list(
             q=f"'{folder_id}' in parents and trashed = false and name contains '.xlsx'",
-            fields="nextPageToken, files(id, name)"
-        ).execute()
-        return results.get('files', [])
+            fields="nextPageToken, files(id, name, modifiedTime, md5Checksum, size)",
+            pageSize=1000
+        )
+        results = []
+        while request is not None:
+            response = request.execute(num_retries=self.num_retries)
+            results.extend(response.get('files', []))
+            request = files.list_next(request, response)
+        return results
 
     def download_file(self, file_id, local_path):
         """Downloads a file from Drive to local path."""
-        request = self.service.files().get_media(fileId=file_id)
-        fh = io.FileIO(local_path, 'wb')
-        downloader = MediaIoBaseDownload(fh, request)
-        done = False
-        while done is False:
-            status, done = downloader.next_chunk()
+        request = self._thread_service().files().get_media(fileId=file_id)
+        with io.FileIO(local_path, 'wb') as fh:
+            downloader = MediaIoBaseDownload(fh, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+            done = False
+            while done is False:
+                status, done = downloader.next_chunk(num_retries=self.num_retries)
         print(f"Downloaded {local_path}")
 
     def upload_file(self, local_path, folder_id, file_name=None):
-        """Uploads a file to a specific Drive folder."""
+        """Uploads a file to a specific Drive folder using a resumable, chunked upload."""
         if not file_name:
             file_name = os.path.basename(local_path)
-            
+
         file_metadata = {
             'name': file_name,
             'parents': [folder_id]
         }
-        media = MediaFileUpload(local_path, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        
-        file = self.service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+        media = MediaFileUpload(local_path, mimetype=XLSX_MIMETYPE,
+                                chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+
+        request = self._thread_service().files().create(body=file_metadata, media_body=media, fields='id')
+        file = None
+        while file is None:
+            status, file = request.next_chunk(num_retries=self.num_retries)
         print(f"Uploaded {file_name} (File ID: {file.get('id')})")
         return file.get('id')
+
+    def download_to_buffer(self, file_id):
+        """Downloads a file from Drive into memory and returns it as a BytesIO."""
+        buffer = io.BytesIO()
+        request = self._thread_service().files().get_media(fileId=file_id)
+        downloader = MediaIoBaseDownload(buffer, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+        done = False
+        while done is False:
+            status, done = downloader.next_chunk(num_retries=self.num_retries)
+        buffer.seek(0)
+        return buffer
+
+    def upload_buffer(self, buffer, folder_id, file_name):
+        """Uploads an in-memory file to a specific Drive folder using a resumable, chunked upload."""
+        file_metadata = {
+            'name': file_name,
+            'parents': [folder_id]
+        }
+        buffer.seek(0)
+        media = MediaIoBaseUpload(buffer, mimetype=XLSX_MIMETYPE,
+                                  chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+
+        request = self._thread_service().files().create(body=file_metadata, media_body=media, fields='id')
+        file = None
+        while file is None:
+            status, file = request.next_chunk(num_retries=self.num_retries)
+        print(f"Uploaded {file_name} (File ID: {file.get('id')})")
+        return file.get('id')
+
+    def _run_concurrently(self, fn, jobs):
+        """
+        Runs fn(*job) for every job on a bounded pool of worker threads.
+        Returns {job: result} for the jobs that succeeded; failures are reported and skipped.
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(fn, *job): job for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    results[job] = future.result()
+                except Exception as e:
+                    print(f"Transfer failed for {job[0]}: {e}")
+        return results
+
+    @staticmethod
+    def _local_names(files):
+        """
+        Local file name per Drive file id. Drive allows several files with the same name in
+        one folder; those get their id as a prefix so they never share a path.
+        """
+        counts = {}
+        for f in files:
+            counts[f['name']] = counts.get(f['name'], 0) + 1
+        names = {}
+        for f in files:
+            names[f['id']] = f['name'] if counts[f['name']] == 1 else f"{f['id']}-{f['name']}"
+        duplicates = sorted(name for name, count in counts.items() if count > 1)
+        if duplicates:
+            print(f"Duplicate file names in folder, prefixed with their Drive ids: {duplicates}")
+        return names
+
+    def download_folder(self, folder_id, local_dir):
+        """
+        Downloads every .xlsx file in a Drive folder (all pages) into local_dir.
+
+        Returns:
+            list_of_paths: Local paths of the files that were downloaded.
+        """
+        os.makedirs(local_dir, exist_ok=True)
+        files = self.list_files_in_folder(folder_id)
+        print(f"Found {len(files)} files in folder {folder_id}")
+
+        names = self._local_names(files)
+        jobs = [(f['id'], os.path.join(local_dir, names[f['id']])) for f in files]
+        done = self._run_concurrently(self.download_file, jobs)
+        return [local_path for (file_id, local_path) in jobs if (file_id, local_path) in done]
+
+    def upload_folder(self, local_paths, folder_id):
+        """
+        Uploads local files to a Drive folder concurrently.
+
+        Returns:
+            dict: local path -> Drive file id, for the files that were uploaded.
+        """
+        jobs = [(path, folder_id) for path in local_paths]
+        done = self._run_concurrently(self.upload_file, jobs)
+        return {path: file_id for (path, _), file_id in done.items()}
+
+    @staticmethod
+    def _load_manifest(local_dir):
+        path = os.path.join(local_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable manifest {path}: {e}")
+            return {}
+
+    @staticmethod
+    def _save_manifest(local_dir, manifest):
+        # Write then rename, so a crash never leaves a half-written manifest
+        path = os.path.join(local_dir, MANIFEST_NAME)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _is_unchanged(remote, cached):
+        """True if the cached copy of a Drive file is still current."""
+        if not cached or not os.path.exists(cached.get('path', '')):
+            return False
+        if remote.get('size') is not None and str(os.path.getsize(cached['path'])) != str(remote['size']):
+            return False
+        if remote.get('md5Checksum'):
+            return remote['md5Checksum'] == cached.get('md5Checksum')
+        # Google-native files carry no checksum; fall back to the modification time
+        return remote.get('modifiedTime') == cached.get('modifiedTime')
+
+    def _download_atomic(self, file_id, local_path):
+        tmp_path = local_path + '.part'
+        self.download_file(file_id, tmp_path)
+        os.replace(tmp_path, local_path)
+
+    def _download_changed(self, folder_id, local_dir):
+        """
+        Downloads the .xlsx files in a Drive folder that are new or changed according to
+        the manifest in local_dir, without recording them.
+
+        Returns:
+            (manifest, pending): the manifest minus files no longer in the folder, and
+            [(file_id, manifest entry)] for each file downloaded, in listing order.
+        """
+        os.makedirs(local_dir, exist_ok=True)
+        manifest = self._load_manifest(local_dir)
+        files = self.list_files_in_folder(folder_id)
+
+        names = self._local_names(files)
+        paths = {f['id']: os.path.join(local_dir, names[f['id']]) for f in files}
+        # A cached copy at another path (renamed file, name now shared) is fetched again
+        changed = [f for f in files if not self._is_unchanged(f, manifest.get(f['id']))
+                   or manifest[f['id']].get('path') != paths[f['id']]]
+        print(f"Found {len(files)} files in folder {folder_id}, {len(changed)} new or changed")
+
+        jobs = [(f['id'], paths[f['id']]) for f in changed]
+        done = self._run_concurrently(self._download_atomic, jobs) if jobs else {}
+
+        # Files no longer in the folder drop out of the manifest
+        remote_ids = {f['id'] for f in files}
+        manifest = {file_id: entry for file_id, entry in manifest.items() if file_id in remote_ids}
+        pending = []
+        for f, job in zip(changed, jobs):
+            if job not in done:
+                continue
+            pending.append((f['id'], {
+                'name': f['name'],
+                'path': job[1],
+                'modifiedTime': f.get('modifiedTime'),
+                'md5Checksum': f.get('md5Checksum'),
+                'size': f.get('size'),
+            }))
+        return manifest, pending
+
+    def sync_changed(self, folder_id, local_dir):
+        """
+        Downloads only the .xlsx files in a Drive folder that are new or changed since
+        the last sync, using the manifest in local_dir. Unchanged files keep their
+        cached copies, so a folder with no changes costs one listing call per page.
+
+        Returns:
+            list_of_paths: Local paths of the files that were (re)downloaded.
+        """
+        manifest, pending = self._download_changed(folder_id, local_dir)
+        manifest.update(pending)
+        self._save_manifest(local_dir, manifest)
+        return [entry['path'] for _, entry in pending]
+
+    def ingest_folder(self, folder_id, cache_dir, output_dir):
+        """
+        Syncs a Drive folder into cache_dir and splits every new or changed sheet
+        with process_excel_file into output_dir. A sheet is recorded in the manifest
+        only once it has been split, so a sheet that fails (or a pass that is
+        interrupted) is downloaded and split again on the next pass.
+
+        Returns:
+            dict: local sheet path -> list of generated files.
+        """
+        # Imported here so listing/syncing does not pay for pandas
+        from processor import process_excel_file
+
+        os.makedirs(output_dir, exist_ok=True)
+        manifest, pending = self._download_changed(folder_id, cache_dir)
+        self._save_manifest(cache_dir, manifest)
+        results = {}
+        for file_id, entry in pending:
+            path = entry['path']
+            success, generated_files = process_excel_file(path, output_dir)
+            if success:
+                results[path] = generated_files
+                manifest[file_id] = entry
+                self._save_manifest(cache_dir, manifest)
+            else:
+                print(f"Failed to process {path}; it will be retried on the next pass")
+        return results
+
+    def _split_in_memory(self, file_id, file_name, target_folder_id):
+        """Drive -> memory -> split -> Drive for a single sheet."""
+        from processor import process_excel_buffer
+
+        buffer = self.download_to_buffer(file_id)
+        success, generated = process_excel_buffer(buffer, file_name)
+        if not success:
+            raise RuntimeError(f"Failed to process {file_name}")
+        return [self.upload_buffer(out, target_folder_id, out_name) for out_name, out in generated]
+
+    def split_folder_in_memory(self, source_folder_id, target_folder_id):
+        """
+        Splits every .xlsx sheet in source_folder_id and uploads the per-group workbooks
+        to target_folder_id without touching local disk. Sheets run concurrently.
+
+        Returns:
+            dict: source file name (prefixed with its Drive id if the name is not unique)
+                -> list of uploaded Drive file ids.
+        """
+        files = self.list_files_in_folder(source_folder_id)
+        print(f"Found {len(files)} files in folder {source_folder_id}")
+
+        names = self._local_names(files)
+        jobs = [(f['id'], names[f['id']], target_folder_id) for f in files]
+        done = self._run_concurrently(self._split_in_memory, jobs)
+        return {job[1]: file_ids for job, file_ids in done.items()}
@@ -0,0 +1,308 @@
+"""
+Local stand-in for the Google Drive v3 endpoints used by DriveClient.
+
+Emulates files.list (with paging), files.get?alt=media (with Range requests) and
+resumable files.create uploads, and can inject transient 5xx errors so the
+retry paths get exercised. Run this module directly for a self-check.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime, timezone
+import hashlib
+import itertools
+import json
+import re
+import threading
+
+import httplib2
+
+GOOGLE_API_ROOT = "https://www.googleapis.com/"
+
+
+class DriveStubServer:
+    def __init__(self, host="127.0.0.1", port=0, page_size=100):
+        self.page_size = page_size
+        self.files = {}  # file id -> file record (metadata + 'data' bytes)
+        self.uploads = {}  # upload id -> {'metadata', 'data', 'size'}
+        self.request_log = []  # (method, path) for every request served
+        self._fail_queue = []  # statuses to return for the next requests
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                stub._dispatch(self, "GET")
+
+            def do_POST(self):
+                stub._dispatch(self, "POST")
+
+            def do_PUT(self):
+                stub._dispatch(self, "PUT")
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    # --- Lifecycle -----------------------------------------------------------
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Test helpers --------------------------------------------------------
+
+    def add_file(self, folder_id, name, data, mime_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"):
+        """Puts a file into the fake Drive and returns its id."""
+        with self._lock:
+            file_id = f"file{next(self._ids)}"
+            self.files[file_id] = self._record(file_id, name, [folder_id], data, mime_type)
+        return file_id
+
+    def update_file(self, file_id, data):
+        """Replaces a file's content, bumping modifiedTime and md5Checksum."""
+        with self._lock:
+            rec = self.files[file_id]
+            self.files[file_id] = self._record(file_id, rec['name'], rec['parents'], data, rec['mimeType'])
+
+    def fail_requests(self, count, status=503):
+        """Makes the next `count` requests fail with the given status."""
+        with self._lock:
+            self._fail_queue.extend([status] * count)
+
+    def http_factory(self):
+        """Returns an httplib2.Http that sends Google API requests to this server."""
+        return StubHttp(self.base_url)
+
+    def files_in(self, folder_id):
+        with self._lock:
+            return [f for f in self.files.values() if folder_id in f['parents']]
+
+    # --- Internals -----------------------------------------------------------
+
+    @staticmethod
+    def _record(file_id, name, parents, data, mime_type):
+        return {
+            'id': file_id,
+            'name': name,
+            'parents': list(parents),
+            'mimeType': mime_type,
+            'size': str(len(data)),
+            'md5Checksum': hashlib.md5(data).hexdigest(),
+            'modifiedTime': datetime.now(timezone.utc).isoformat(timespec='microseconds').replace('+00:00', 'Z'),
+            'data': data,
+        }
+
+    @staticmethod
+    def _public(rec):
+        return {k: v for k, v in rec.items() if k != 'data'}
+
+    def _send(self, handler, status, body=b"", headers=None, content_type="application/json"):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _dispatch(self, handler, method):
+        url = urlparse(handler.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+
+        with self._lock:
+            self.request_log.append((method, url.path))
+            injected = self._fail_queue.pop(0) if self._fail_queue else None
+        if injected:
+            return self._send(handler, injected, {"error": {"code": injected, "message": "injected failure"}})
+
+        if method == "GET" and url.path == "/drive/v3/files":
+            return self._list(handler, query)
+        match = re.fullmatch(r"/drive/v3/files/([^/]+)", url.path)
+        if method == "GET" and match and query.get("alt") == "media":
+            return self._media(handler, match.group(1))
+        if url.path == "/upload/drive/v3/files" and query.get("uploadType") == "resumable":
+            if method == "POST":
+                return self._start_upload(handler, body)
+            if method == "PUT":
+                return self._upload_chunk(handler, query.get("upload_id"), body)
+        return self._send(handler, 404, {"error": {"code": 404, "message": f"Unknown endpoint {method} {url.path}"}})
+
+    def _list(self, handler, query):
+        match = re.search(r"'([^']+)' in parents", query.get("q", ""))
+        folder_id = match.group(1) if match else None
+        name_match = re.search(r"name contains '([^']+)'", query.get("q", ""))
+
+        with self._lock:
+            files = sorted(
+                (f for f in self.files.values()
+                 if folder_id in f['parents'] and (not name_match or name_match.group(1) in f['name'])),
+                key=lambda f: f['name'])
+        page_size = min(int(query.get("pageSize", self.page_size)), self.page_size)
+        offset = int(query.get("pageToken", 0))
+        page = files[offset:offset + page_size]
+
+        response = {"files": [self._public(f) for f in page]}
+        if offset + page_size < len(files):
+            response["nextPageToken"] = str(offset + page_size)
+        return self._send(handler, 200, response)
+
+    def _media(self, handler, file_id):
+        with self._lock:
+            rec = self.files.get(file_id)
+        if rec is None:
+            return self._send(handler, 404, {"error": {"code": 404, "message": "File not found"}})
+
+        data = rec['data']
+        total = len(data)
+        range_header = handler.headers.get("Range")
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", range_header or "")
+        if not match:
+            return self._send(handler, 200, data, content_type=rec['mimeType'])
+        start = int(match.group(1))
+        end = min(int(match.group(2)) if match.group(2) else total - 1, total - 1)
+        if total and start >= total:
+            return self._send(handler, 416, b"", {"Content-Range": f"bytes */{total}"})
+        return self._send(handler, 206, data[start:end + 1],
+                          {"Content-Range": f"bytes {start}-{end}/{total}"},
+                          content_type=rec['mimeType'])
+
+    def _start_upload(self, handler, body):
+        metadata = json.loads(body or b"{}")
+        with self._lock:
+            upload_id = f"upload{next(self._ids)}"
+            self.uploads[upload_id] = {
+                'metadata': metadata,
+                'data': bytearray(),
+                'mimeType': handler.headers.get("X-Upload-Content-Type", "application/octet-stream"),
+            }
+        location = f"{self.base_url}/upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}"
+        return self._send(handler, 200, b"", {"Location": location})
+
+    def _upload_chunk(self, handler, upload_id, body):
+        with self._lock:
+            session = self.uploads.get(upload_id)
+        if session is None:
+            return self._send(handler, 404, {"error": {"code": 404, "message": "Unknown upload session"}})
+
+        content_range = handler.headers.get("Content-Range", "")
+        data = session['data']
+
+        # Status query after an interrupted chunk: "bytes */total"
+        status_query = re.fullmatch(r"bytes \*/(\d+|\*)", content_range)
+        if status_query:
+            headers = {"Range": f"bytes=0-{len(data) - 1}"} if data else {}
+            return self._send(handler, 308, b"", headers)
+
+        match = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+|\*)", content_range)
+        if not match:
+            return self._send(handler, 400, {"error": {"code": 400, "message": "Bad Content-Range"}})
+        start, total = int(match.group(1)), match.group(3)
+        if start != len(data):
+            return self._send(handler, 308, b"", {"Range": f"bytes=0-{len(data) - 1}"} if data else {})
+        data.extend(body)
+
+        if total != "*" and len(data) >= int(total):
+            meta = session['metadata']
+            with self._lock:
+                file_id = f"file{next(self._ids)}"
+                self.files[file_id] = self._record(file_id, meta.get('name', upload_id),
+                                                   meta.get('parents', []), bytes(data), session['mimeType'])
+                del self.uploads[upload_id]
+            return self._send(handler, 200, {"id": file_id})
+        return self._send(handler, 308, b"", {"Range": f"bytes=0-{len(data) - 1}"})
+
+
+class StubHttp(httplib2.Http):
+    """httplib2.Http that rewrites Google API URLs to a local base URL."""
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url.rstrip("/") + "/"
+        # Same as googleapiclient.http.build_http: 308 means "Resume Incomplete", not a redirect
+        self.redirect_codes = self.redirect_codes - {308}
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        if uri.startswith(GOOGLE_API_ROOT):
+            uri = self.base_url + uri[len(GOOGLE_API_ROOT):]
+        return super().request(uri, method, body, headers, *args, **kwargs)
+
+
+if __name__ == "__main__":
+    # Self-check: paged listing, concurrent downloads and resumable uploads with retries
+    import os
+    import tempfile
+    from drive_client import DriveClient
+
+    with DriveStubServer(page_size=10) as stub:
+        blobs = {f"sheet-{i:02d}.xlsx": os.urandom(300_000 + i) for i in range(25)}
+        for name, data in blobs.items():
+            stub.add_file("source", name, data)
+
+        client = DriveClient(http_factory=stub.http_factory, max_workers=4, num_retries=3)
+        client.authenticate()
+
+        listed = client.list_files_in_folder("source")
+        assert len(listed) == 25, f"expected 25 files across 3 pages, got {len(listed)}"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            stub.fail_requests(2)
+            paths = client.download_folder("source", tmp)
+            assert len(paths) == 25
+            for path in paths:
+                with open(path, "rb") as fh:
+                    assert fh.read() == blobs[os.path.basename(path)], path
+
+            stub.fail_requests(2)
+            uploaded = client.upload_folder(paths, "target")
+            assert len(uploaded) == 25
+
+        for rec in stub.files_in("target"):
+            assert rec['data'] == blobs[rec['name']], rec['name']
+
+        # Drive allows duplicate names in a folder: each file gets its own cached copy,
+        # and a second sync with nothing changed downloads nothing
+        stub.add_file("dupes", "Tierra.xlsx", b"first")
+        stub.add_file("dupes", "Tierra.xlsx", b"second")
+        with tempfile.TemporaryDirectory() as tmp:
+            synced = client.sync_changed("dupes", tmp)
+            assert len(set(synced)) == 2, synced
+            assert sorted(open(path, "rb").read() for path in synced) == [b"first", b"second"]
+            assert client.sync_changed("dupes", tmp) == []
+
+        # ingest_folder records a sheet only once it is split: an unreadable sheet is
+        # fetched and retried on every pass, a split one is not
+        import io
+        import pandas as pd
+        good = io.BytesIO()
+        pd.DataFrame({'Unit Id': [1, 2], 'BU area': [100, 120], 'Price 1': [1, 2]}).to_excel(good, index=False)
+        stub.add_file("ingest", "Good.xlsx", good.getvalue())
+        stub.add_file("ingest", "Broken.xlsx", b"not a workbook")
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir, out_dir = os.path.join(tmp, "cache"), os.path.join(tmp, "out")
+            first = client.ingest_folder("ingest", cache_dir, out_dir)
+            assert [os.path.basename(path) for path in first] == ["Good.xlsx"], first
+            assert client.ingest_folder("ingest", cache_dir, out_dir) == {}
+            assert client.sync_changed("ingest", cache_dir) == [os.path.join(cache_dir, "Broken.xlsx")]
+
+    print("Drive stub self-check passed.")
@@ -6,13 +6,54 @@ import os
 # Ensure current directory is in path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from realty_scraper import run as run_scraper
-from page_generator import generate_landing_page
+from realty_scraper import run as run_scraper, OUTPUT_DIR
+from page_generator import generate_landing_page, generate_catalog, generate_catalog_index
+from offline_assets import DEFAULT_PAGE_BUDGET
+from metadata_sink import read_records, sink_path
+import image_pipeline
+
+def build_catalog(output_dir, workers=None, force=False, offline=False, budget=None, strict=False):
+    """Rebuilds the landing pages and the catalog page of every scraped project from the metadata sink, without re-scraping."""
+    records = read_records(sink_path(output_dir))
+    if not records:
+        print(f"No scraped projects found in {output_dir}.")
+        return
+    # Projects scraped by the server come without image variants; variants already on disk are reused
+    missing = [record for record in records if "Image Variants" not in record]
+    if missing:
+        print(f"Generating image variants for {len(missing)} projects...")
+        with image_pipeline.start_pool(workers) as pool:
+            for record in missing:
+                image_pipeline.add_image_variants(record, pool)
+    print(f"Building landing pages for {len(records)} projects...")
+    summary = generate_catalog(records, max_workers=workers, force=force, offline=offline, budget=budget,
+                               strict=strict)
+    if summary["failed"]:
+        print(f"Failed: {summary['failed']}")
+    # Catalog page and search index over every project
+    generate_catalog_index(records, output_dir)
 
 def main():
     parser = argparse.ArgumentParser(description="Scrape Nawy project and generate landing page.")
-    parser.add_argument("url", help="Nawy Project URL")
+    parser.add_argument("url", nargs="?", help="Nawy Project URL")
+    parser.add_argument("--catalog", action="store_true",
+                        help="Generate pages for every already scraped project instead of scraping a URL")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Scraper output directory (with --catalog)")
+    parser.add_argument("--workers", type=int, help="Parallel page builds (with --catalog, default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Rebuild pages even if their inputs are unchanged")
+    parser.add_argument("--offline", action="store_true",
+                        help="Self-contained pages: self-hosted font subset, sized and preloaded images")
+    parser.add_argument("--budget-kb", type=int, default=DEFAULT_PAGE_BUDGET // 1000,
+                        help="Page weight budget for --offline pages, in KB")
+    parser.add_argument("--strict", action="store_true", help="Fail pages over the weight budget")
     args = parser.parse_args()
+    budget = args.budget_kb * 1000
+
+    if args.catalog:
+        build_catalog(args.output_dir, args.workers, args.force, args.offline, budget, args.strict)
+        return
+    if not args.url:
+        parser.error("a URL is required unless --catalog is given")
     
     print(f"Starting process for: {args.url}")
     
@@ -29,7 +70,7 @@ def main():
     
     # 2. Generate Page
     print(">>> Phase 2: Generating Landing Page...")
-    page_path = generate_landing_page(project_data)
+    page_path = generate_landing_page(project_data, offline=args.offline, budget=budget, strict=args.strict)
     
     print(f"\nSUCCESS! Landing page created at:\n{page_path}")
     print(f"Open this file in your browser to view the result.")
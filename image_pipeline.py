@@ -0,0 +1,170 @@
+"""
+Resized WebP derivatives for scraped images.
+
+Every downloaded image (gallery and master plan) gets a fixed set of variants, each
+fitted inside a bounding box and never upscaled, written next to the original under
+<project dir>/derivatives. Images are processed across a process pool; variants that
+are newer than their source are reused, so re-running over a project is cheap.
+The result is recorded in the project metadata under "Image Variants":
+
+    {"gallery_1.jpg": {"width": 4000, "height": 3000,
+                       "variants": {"thumb": {"path": "derivatives/gallery_1-640w.webp",
+                                              "width": 640, "height": 480, "bytes": 41234}, ...}}}
+
+Variant paths are relative to the project directory, so pages can link them directly.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+
+from PIL import Image, ImageOps
+
+DERIVATIVES_DIR = "derivatives"
+WEBP_QUALITY = 80
+
+# name -> bounding box (width, height). Gallery tiles use thumb, page sections medium/large.
+VARIANTS = {
+    "thumb": (640, 480),
+    "medium": (1280, 960),
+    "large": (1920, 1440),
+}
+
+# EXIF orientations that swap width and height
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def variant_relpath(image_path, name):
+    """Path of a variant relative to the image's directory; the box width is part of the name."""
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(DERIVATIVES_DIR, f"{stem}-{VARIANTS[name][0]}w.webp")
+
+
+def fit_size(size, box):
+    """Size of an image of `size` scaled to fit inside `box`, never upscaled."""
+    width, height = size
+    scale = min(1.0, box[0] / width, box[1] / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def oriented_size(im):
+    """Display size of an opened image, after its EXIF orientation is applied."""
+    if im.getexif().get(0x0112) in _TRANSPOSED_ORIENTATIONS:
+        return im.height, im.width
+    return im.size
+
+
+def is_up_to_date(source_path, variant_path):
+    return os.path.exists(variant_path) and os.path.getmtime(variant_path) >= os.path.getmtime(source_path)
+
+
+def make_variants(image_path):
+    """
+    Generates the missing or stale variants of one image. Runs in a worker process.
+
+    Returns:
+        {"source", "width", "height", "variants": {name: {"path", "width", "height", "bytes"}}, "generated"},
+        or None if the image cannot be read.
+    """
+    base_dir = os.path.dirname(image_path)
+    try:
+        with Image.open(image_path) as im:
+            size = oriented_size(im)
+            targets = {name: fit_size(size, box) for name, box in VARIANTS.items()}
+            missing = [name for name in VARIANTS
+                       if not is_up_to_date(image_path, os.path.join(base_dir, variant_relpath(image_path, name)))]
+
+            if missing:
+                os.makedirs(os.path.join(base_dir, DERIVATIVES_DIR), exist_ok=True)
+                # Largest first, so each variant is resized from the previous one rather than the original
+                missing.sort(key=lambda name: targets[name][0] * targets[name][1], reverse=True)
+                largest = targets[missing[0]]
+                if size != im.size:
+                    largest = largest[::-1]
+                # JPEG only: let the decoder downscale by a power of two while it reads
+                im.draft("RGB", largest)
+                frame = ImageOps.exif_transpose(im)
+                if frame.mode not in ("RGB", "RGBA"):
+                    has_alpha = frame.mode in ("LA", "PA") or "transparency" in frame.info
+                    frame = frame.convert("RGBA" if has_alpha else "RGB")
+
+                for name in missing:
+                    if frame.size != targets[name]:
+                        frame = frame.resize(targets[name], Image.Resampling.LANCZOS, reducing_gap=3.0)
+                    out_path = os.path.join(base_dir, variant_relpath(image_path, name))
+                    # Write then rename, so an interrupted run never leaves a truncated "up to date" variant
+                    frame.save(out_path + ".part", "WEBP", quality=WEBP_QUALITY, method=4)
+                    os.replace(out_path + ".part", out_path)
+    except Exception as e:
+        print(f"Failed to generate variants for {image_path}: {e}")
+        return None
+
+    variants = {}
+    for name in VARIANTS:
+        rel = variant_relpath(image_path, name)
+        full = os.path.join(base_dir, rel)
+        with Image.open(full) as variant:
+            width, height = variant.size
+        variants[name] = {"path": rel.replace(os.sep, "/"), "width": width, "height": height,
+                          "bytes": os.path.getsize(full)}
+    return {"source": image_path, "width": size[0], "height": size[1], "variants": variants,
+            "generated": len(missing)}
+
+
+def project_images(record):
+    """Downloaded image paths of a scraped project record (master plan first)."""
+    paths = [record.get("Master Plan Path")] + list(record.get("Gallery Paths") or [])
+    return [path for path in paths if path]
+
+
+def attach_variants(record, results):
+    """Stores make_variants results in record["Image Variants"], keyed by image file name."""
+    record["Image Variants"] = {
+        os.path.basename(info["source"]): {key: info[key] for key in ("width", "height", "variants")}
+        for info in results if info
+    }
+    return record
+
+
+def start_pool(max_workers=None):
+    """
+    Process pool for make_variants. Workers are spawned, not forked: the scrapers and the
+    server run threads (Playwright, event loop) that must not be copied into a fork.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def generate_variants(image_paths, executor=None, max_workers=None):
+    """
+    Runs make_variants over image_paths and returns the results in the same order.
+
+    executor: Shared ProcessPoolExecutor; without one, a pool is started for this call.
+    """
+    if executor is not None:
+        return list(executor.map(make_variants, image_paths))
+
+    workers = min(len(image_paths), max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        # Nothing to parallelise, skip the process start-up cost
+        return [make_variants(path) for path in image_paths]
+    with start_pool(workers) as pool:
+        return list(pool.map(make_variants, image_paths))
+
+
+def add_image_variants(record, executor=None):
+    """Generates the variants of every image of a scraped project record and records them."""
+    results = generate_variants(project_images(record), executor)
+    generated = sum(info["generated"] for info in results if info)
+    print(f"Image variants: {len(results)} images, {generated} variants generated")
+    return attach_variants(record, results)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Generate WebP variants for images")
+    parser.add_argument("images", nargs="+")
+    args = parser.parse_args()
+
+    for info in generate_variants(args.images):
+        print(json.dumps(info, indent=2))
@@ -0,0 +1,191 @@
+"""
+Persistent, indexed inventory of units from processed sheets.
+
+Every processed sheet's mapped columns (code, sale_type, size, beds_no, baths_no,
+Floor Number, badget) plus project are stored in SQLite with indexes on project,
+size, beds and price, so filtered, sorted, paginated queries never re-read Excel files.
+Re-processing a file replaces the rows previously loaded from it.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+INVENTORY_FILENAME = "inventory.sqlite3"
+
+# Result key -> SQL column
+COLUMNS = {
+    'code': 'code',
+    'sale_type': 'sale_type',
+    'size': 'size',
+    'beds_no': 'beds_no',
+    'baths_no': 'baths_no',
+    'Floor Number': 'floor_number',
+    'badget': 'badget',
+    'project': 'project',
+}
+
+SORTABLE = {'code', 'size', 'beds_no', 'baths_no', 'Floor Number', 'badget', 'project'}
+MAX_PAGE_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    source TEXT NOT NULL,
+    project TEXT,
+    code TEXT,
+    sale_type TEXT,
+    size REAL,
+    beds_no INTEGER,
+    baths_no INTEGER,
+    floor_number TEXT,
+    badget REAL
+);
+CREATE INDEX IF NOT EXISTS idx_units_source ON units (source);
+CREATE INDEX IF NOT EXISTS idx_units_project ON units (project);
+CREATE INDEX IF NOT EXISTS idx_units_size ON units (size);
+CREATE INDEX IF NOT EXISTS idx_units_beds ON units (beds_no);
+CREATE INDEX IF NOT EXISTS idx_units_price ON units (badget);
+CREATE INDEX IF NOT EXISTS idx_units_project_beds_price ON units (project, beds_no, badget);
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    rows INTEGER,
+    loaded_at REAL
+);
+"""
+
+
+def _to_number(series):
+    """Numeric view of a column; strings like '1,250,000' are parsed, anything else becomes NULL."""
+    import pandas as pd
+
+    # Text columns are object dtype on pandas 2 but "str" on pandas 3
+    if not pd.api.types.is_numeric_dtype(series):
+        series = series.astype(str).str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(series, errors='coerce')
+
+
+def _to_text(series):
+    return series.astype(object).where(series.notna(), None).map(lambda v: None if v is None else str(v))
+
+
+class InventoryStore:
+    def __init__(self, path):
+        self.path = path
+        self._schema_ready = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if not self._schema_ready:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._schema_ready:
+            with self._lock:
+                if not self._schema_ready:
+                    # WAL lets queries run while a sheet is being loaded
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(SCHEMA)
+                    self._schema_ready = True
+        return conn
+
+    def replace_source(self, source, frame):
+        """
+        Replaces all units loaded from `source` with the rows of `frame`
+        (a processor.mapped_frame: mapped target columns plus 'project').
+        """
+        rows = list(zip(
+            [source] * len(frame),
+            _to_text(frame['project']),
+            _to_text(frame['code']),
+            _to_text(frame['sale_type']),
+            _to_number(frame['size']).astype(object).where(lambda s: s.notna(), None),
+            _to_number(frame['beds_no']).round().astype('Int64').astype(object).where(lambda s: s.notna(), None),
+            _to_number(frame['baths_no']).round().astype('Int64').astype(object).where(lambda s: s.notna(), None),
+            _to_text(frame['Floor Number']),
+            _to_number(frame['badget']).astype(object).where(lambda s: s.notna(), None),
+        ))
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM units WHERE source = ?", (source,))
+                conn.executemany(
+                    "INSERT INTO units (source, project, code, sale_type, size, beds_no, baths_no, floor_number, badget) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.execute("INSERT OR REPLACE INTO sources (source, rows, loaded_at) VALUES (?, ?, ?)",
+                             (source, len(rows), time.time()))
+        finally:
+            conn.close()
+        print(f"Inventory: loaded {len(rows)} units from {source}")
+        return len(rows)
+
+    def query(self, project=None, min_size=None, max_size=None, beds=None, min_beds=None, max_beds=None,
+              min_price=None, max_price=None, sale_type=None, sort='badget', order='asc', page=1, page_size=50):
+        """
+        Returns one page of matching units:
+            {"total": int, "page": int, "page_size": int, "items": [dict, ...]}
+        """
+        if sort not in SORTABLE:
+            raise ValueError(f"Cannot sort by {sort!r}; choose one of {sorted(SORTABLE)}")
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+        page = max(int(page), 1)
+        page_size = min(max(int(page_size), 1), MAX_PAGE_SIZE)
+
+        clauses, params = [], []
+        for sql, value in (
+            ("project = ?", project),
+            ("sale_type = ?", sale_type),
+            ("beds_no = ?", beds),
+            ("beds_no >= ?", min_beds),
+            ("beds_no <= ?", max_beds),
+            ("size >= ?", min_size),
+            ("size <= ?", max_size),
+            ("badget >= ?", min_price),
+            ("badget <= ?", max_price),
+        ):
+            if value is not None:
+                clauses.append(sql)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        select = ", ".join(f'{col} AS "{key}"' for key, col in COLUMNS.items())
+        # Units without the sort value go last in either direction
+        order_by = f"{COLUMNS[sort]} IS NULL, {COLUMNS[sort]} {order.upper()}, rowid"
+
+        conn = self._connect()
+        try:
+            total = conn.execute(f"SELECT COUNT(*) FROM units {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT {select} FROM units {where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+                params + [page_size, (page - 1) * page_size]).fetchall()
+        finally:
+            conn.close()
+
+        return {"total": total, "page": page, "page_size": page_size, "items": [dict(row) for row in rows]}
+
+
+if __name__ == "__main__":
+    # Self-check: text prices/sizes ("1,250,000") are parsed, not stored as NULL
+    import tempfile
+    import pandas as pd
+
+    frame = pd.DataFrame({
+        'project': ["Tierra", "Tierra", "Tierra"],
+        'code': ["T-1", "T-2", "T-3"],
+        'sale_type': ["Primary", "Resale", "Primary"],
+        'size': ["120", "1,050", "95"],
+        'beds_no': ["3", "3", "2"],
+        'baths_no': [2, 3, 1],
+        'Floor Number': ["1", "GF", "2"],
+        'badget': ["1,250,000", "2,400,000", "n/a"],
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        store = InventoryStore(os.path.join(tmp, INVENTORY_FILENAME))
+        store.replace_source("Tierra.xlsx", frame)
+        result = store.query(project="Tierra", beds=3, max_price=1500000)
+        assert result["total"] == 1, result
+        assert result["items"][0]["badget"] == 1250000 and result["items"][0]["size"] == 120, result
+        assert store.query(min_size=1000)["items"][0]["code"] == "T-2"
+        assert store.query(project="Tierra")["total"] == 3
+    print("Inventory self-check passed.")
@@ -0,0 +1,145 @@
+"""
+Crash-safe, append-only store for scraped project metadata.
+
+Each project record is appended to a JSONL file as soon as it is scraped and flushed
+immediately; fsync is batched (every N records or T seconds) to keep the crawl fast.
+extracted_projects.xlsx is a derived export built from this file on demand.
+"""
+import json
+import os
+import threading
+import time
+
+SINK_FILENAME = "extracted_projects.jsonl"
+EXPORT_FILENAME = "extracted_projects.xlsx"
+
+
+class ProjectSink:
+    def __init__(self, path, fsync_every=10, fsync_interval=2.0):
+        """
+        Safe to share between threads (the async engine appends through asyncio.to_thread).
+
+        fsync_every: fsync after this many appended records...
+        fsync_interval: ...or once this many seconds have passed since the last fsync.
+        """
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        if self._ends_torn(path):
+            # Terminate a line torn by an earlier crash so the next record starts clean
+            self._file.write("\n")
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        # Guards the file and the fsync counters: writes, flushes, fsyncs and close
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ends_torn(path):
+        if os.path.getsize(path) == 0:
+            return False
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def append(self, record):
+        """
+        Appends one project record. It survives a process crash as soon as this returns.
+        Raises ValueError once the sink is closed.
+        """
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._file.closed:
+                raise ValueError(f"Metadata sink {self.path} is closed; record for "
+                                 f"{record.get('Project Name')!r} not written")
+            self._file.write(line)
+            self._file.flush()
+            self._pending += 1
+            if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def sync(self):
+        """Forces appended records to disk (survives a power loss, not just a crash)."""
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+
+    def _sync(self):
+        if self._pending:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def sink_path(output_dir):
+    return os.path.join(output_dir, SINK_FILENAME)
+
+
+def read_records(path):
+    """
+    Reads every record from a sink file. A torn last line (crash mid-write) is skipped.
+    When a project was scraped more than once, the latest record wins.
+    """
+    if not os.path.exists(path):
+        return []
+    records = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"Skipping unreadable record at {path}:{line_no}")
+                continue
+            # Re-inserting moves the project to the position of its latest scrape
+            key = record.get("Link") or record.get("Output Dir") or line_no
+            records.pop(key, None)
+            records[key] = record
+    return list(records.values())
+
+
+def export_excel(output_dir, output_path=None):
+    """
+    Builds extracted_projects.xlsx from the sink in output_dir.
+
+    Returns:
+        The export path, or None if nothing has been scraped yet.
+    """
+    records = read_records(sink_path(output_dir))
+    if not records:
+        return None
+
+    # pandas is only needed for the export
+    import pandas as pd
+
+    output_path = output_path or os.path.join(output_dir, EXPORT_FILENAME)
+    df = pd.DataFrame(records)
+    df.to_excel(output_path, index=False)
+    print(f"Saved metadata to {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export scraped project metadata to Excel")
+    parser.add_argument("--output-dir", default="output_files")
+    args = parser.parse_args()
+
+    if not export_excel(args.output_dir):
+        print("No scraped projects found.")
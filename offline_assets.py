@@ -0,0 +1,115 @@
+"""
+Self-hosted assets and the weight budget for offline landing pages (page_generator offline mode).
+
+Fonts: only the glyphs a page actually uses are requested from Google Fonts (the css2
+API's `text=` parameter returns a subset that is typically a few KB), downloaded once
+into <project dir>/fonts and referenced from inlined @font-face rules. When the
+subset cannot be fetched, pages fall back to the system font stack.
+
+Budget: the page, its fonts and every image it references by `src` are summed and
+compared with a byte budget when the page is generated.
+"""
+import hashlib
+import html
+import os
+import re
+from urllib.parse import urlencode
+
+import requests
+
+FONT_FAMILY = "Cairo"
+FONT_WEIGHTS = (400, 700)
+FONTS_DIR = "fonts"
+FONTS_CSS_URL = "https://fonts.googleapis.com/css2"
+# Google Fonts only serves woff2 to user agents it recognises as modern browsers
+FONT_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+FONT_TIMEOUT = 15
+
+# Page + fonts + images referenced by src, in bytes
+DEFAULT_PAGE_BUDGET = 1_000_000
+
+
+class PageBudgetError(ValueError):
+    """A page exceeded its weight budget in strict mode."""
+
+
+def subset_text(page_html):
+    """Every character a page displays (tags, styles and scripts removed), sorted."""
+    text = re.sub(r"<(style|script)\b.*?</\1>", " ", page_html, flags=re.S | re.I)
+    text = html.unescape(re.sub(r"<[^>]+>", " ", text))
+    return "".join(sorted(set(text) - set("\r\n\t")))
+
+
+def self_host_fonts(output_dir, text):
+    """
+    Downloads the FONT_FAMILY subset covering `text` into <output_dir>/fonts.
+
+    Returns:
+        (@font-face CSS with relative URLs, [font file paths]), or (None, []) if the
+        subset could not be fetched. A subset fetched earlier for the same text is reused.
+    """
+    key = hashlib.sha256(f"{FONT_FAMILY}:{FONT_WEIGHTS}:{text}".encode("utf-8")).hexdigest()[:12]
+    fonts_dir = os.path.join(output_dir, FONTS_DIR)
+    css_path = os.path.join(fonts_dir, f"{FONT_FAMILY.lower()}-{key}.css")
+
+    if os.path.exists(css_path):
+        with open(css_path, "r", encoding="utf-8") as f:
+            css = f.read()
+        return css, _font_files(output_dir, css)
+
+    weights = ";".join(str(w) for w in FONT_WEIGHTS)
+    query = urlencode({"family": f"{FONT_FAMILY}:wght@{weights}", "text": text, "display": "swap"})
+    try:
+        res = requests.get(f"{FONTS_CSS_URL}?{query}", headers={"User-Agent": FONT_USER_AGENT},
+                           timeout=FONT_TIMEOUT)
+        res.raise_for_status()
+        css = res.text
+
+        os.makedirs(fonts_dir, exist_ok=True)
+        for n, url in enumerate(dict.fromkeys(re.findall(r"url\((https://[^)]+)\)", css)), 1):
+            font = requests.get(url, headers={"User-Agent": FONT_USER_AGENT}, timeout=FONT_TIMEOUT)
+            font.raise_for_status()
+            name = f"{FONT_FAMILY.lower()}-{key}-{n}.woff2"
+            with open(os.path.join(fonts_dir, name), "wb") as f:
+                f.write(font.content)
+            css = css.replace(url, f"{FONTS_DIR}/{name}")
+    except Exception as e:
+        print(f"Font subset unavailable, falling back to system fonts: {e}")
+        return None, []
+
+    # The CSS goes last, so its presence means every font file is in place
+    with open(css_path, "w", encoding="utf-8") as f:
+        f.write(css)
+    return css, _font_files(output_dir, css)
+
+
+def _font_files(output_dir, css):
+    return [os.path.join(output_dir, rel) for rel in dict.fromkeys(re.findall(r"url\(([^)]+)\)", css))]
+
+
+def page_weight(output_dir, page_html, font_files, image_srcs):
+    """Bytes per kind of resource for a page: {"html", "fonts", "images", "total"}."""
+    weights = {
+        "html": len(page_html.encode("utf-8")),
+        "fonts": sum(os.path.getsize(path) for path in font_files if os.path.exists(path)),
+        "images": 0,
+    }
+    for src in dict.fromkeys(image_srcs):
+        path = os.path.join(output_dir, src)
+        if os.path.exists(path):
+            weights["images"] += os.path.getsize(path)
+    weights["total"] = sum(weights.values())
+    return weights
+
+
+def check_budget(weights, budget, strict=False, label="page"):
+    """Reports a page over budget; raises PageBudgetError instead in strict mode."""
+    if weights["total"] <= budget:
+        return True
+    message = (f"{label} weighs {weights['total']} bytes, over its {budget} byte budget "
+               f"(html {weights['html']}, fonts {weights['fonts']}, images {weights['images']})")
+    if strict:
+        raise PageBudgetError(message)
+    print(f"Warning: {message}")
+    return False
@@ -1,195 +1,189 @@
+import hashlib
+import html
+import json
 import os
+import re
+import string
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-def generate_landing_page(data):
-    """
-    Generates a single-page HTML landing page for the project.
-    data: Dictionary containing project details from the scraper.
-    """
-    project_name = data.get("Project Name", "Real Estate Project")
-    description = data.get("Description", "")
-    description_lines = description.split('\n') if description else []
-    
-    # Format description (take first 2 paragraphs as lead, rest as details)
-    desc_html = ""
-    for line in description_lines[:20]: # Limit for main view
-        if line.strip():
-            desc_html += f"<p>{line}</p>"
+import offline_assets
+import search_index
 
-    master_plan_path = data.get("Master Plan Path")
-    gallery_paths = data.get("Gallery Paths", [])
-    output_dir = data.get("Output Dir")
-    
-    # Relative paths for HTML
-    mp_rel = os.path.basename(master_plan_path) if master_plan_path else ""
-    gallery_rel = [os.path.basename(p) for p in gallery_paths]
+# Bump whenever the templates or the rendering below change: the next batch run rebuilds every page
+TEMPLATE_VERSION = "3"
 
-    # Hero Image (use first gallery image or generic)
-    hero_bg = gallery_rel[0] if gallery_rel else ""
+# Inputs hash of the last render, next to index.html (see page_inputs_hash)
+PAGE_HASH_FILENAME = ".page_hash"
 
-    html_content = f"""<!DOCTYPE html>
+# Gallery tiles are at most ~400 CSS px wide (300 px minimum column, 1200 px container)
+GALLERY_SIZES = "(max-width: 768px) 100vw, 400px"
+
+# Compiled once at import; rendering a page is a single substitution
+PAGE_TEMPLATE = string.Template("""<!DOCTYPE html>
 <html lang="ar" dir="rtl">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{project_name}</title>
-    <link href="https://fonts.googleapis.com/css2?family=Cairo:wght@300;400;600;700&display=swap" rel="stylesheet">
+    <title>$project_name</title>
+    $head_assets
     <style>
-        :root {{
+        :root {
             --primary: #1a1a1a;
             --accent: #c6a466; /* Gold/Bronze accent */
             --light: #f5f5f5;
             --text: #333;
-        }}
+        }
         
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
+        * { margin: 0; padding: 0; box-sizing: border-box; }
         
-        body {{
+        body {
             font-family: 'Cairo', sans-serif;
             color: var(--text);
             background-color: #fff;
             line-height: 1.6;
-        }}
+        }
 
-        h1, h2, h3 {{ font-weight: 700; color: var(--primary); }}
+        h1, h2, h3 { font-weight: 700; color: var(--primary); }
 
         /* Hero Section */
-        .hero {{
+        .hero {
             height: 100vh;
-            background: linear-gradient(rgba(0,0,0,0.4), rgba(0,0,0,0.4)), url('{hero_bg}') no-repeat center center/cover;
+            background: $hero_background;
             display: flex;
             align-items: center;
             justify-content: center;
             text-align: center;
             color: white;
             position: relative;
-        }}
+        }
 
-        .hero h1 {{
+        .hero h1 {
             font-size: 3.5rem;
             margin-bottom: 1rem;
             color: white;
             text-shadow: 2px 2px 4px rgba(0,0,0,0.5);
-        }}
+        }
 
-        .hero-scroll {{
+        .hero-scroll {
             position: absolute;
             bottom: 30px;
             animation: bounce 2s infinite;
-        }}
+        }
         
-        @keyframes bounce {{
-            0%, 20%, 50%, 80%, 100% {{transform: translateY(0);}}
-            40% {{transform: translateY(-10px);}}
-            60% {{transform: translateY(-5px);}}
-        }}
+        @keyframes bounce {
+            0%, 20%, 50%, 80%, 100% {transform: translateY(0);}
+            40% {transform: translateY(-10px);}
+            60% {transform: translateY(-5px);}
+        }
 
         /* Container */
-        .container {{
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             padding: 40px 20px;
-        }}
+        }
 
         /* About Section */
-        .section-title {{
+        .section-title {
             font-size: 2.5rem;
             margin-bottom: 2rem;
             text-align: center;
             position: relative;
             padding-bottom: 15px;
-        }}
+        }
         
-        .section-title::after {{
+        .section-title::after {
             content: '';
             display: block;
             width: 60px;
             height: 3px;
             background: var(--accent);
             margin: 10px auto 0;
-        }}
+        }
 
-        .about-content {{
+        .about-content {
             display: flex;
             gap: 40px;
             align-items: start;
-        }}
+        }
 
-        .about-text {{ flex: 1; font-size: 1.1rem; text-align: justify; }}
-        .about-text p {{ margin-bottom: 15px; }}
+        .about-text { flex: 1; font-size: 1.1rem; text-align: justify; }
+        .about-text p { margin-bottom: 15px; }
         
-        .about-image {{
+        .about-image {
             flex: 1;
             box-shadow: 20px 20px 0 var(--accent);
-        }}
+        }
         
-        .about-image img {{
+        .about-image img {
             width: 100%;
             display: block;
             border-radius: 4px;
-        }}
+        }
 
         /* Master Plan */
-        .master-plan {{
+        .master-plan {
             background: var(--light);
             padding: 80px 0;
-        }}
+        }
         
-        .mp-container {{ text-align: center; }}
-        .mp-container img {{
+        .mp-container { text-align: center; }
+        .mp-container img {
             max-width: 100%;
             border: 5px solid white;
             box-shadow: 0 5px 15px rgba(0,0,0,0.1);
             cursor: zoom-in;
             transition: transform 0.3s;
-        }}
+        }
         
-        .mp-container img:hover {{ transform: scale(1.02); }}
+        .mp-container img:hover { transform: scale(1.02); }
 
         /* Gallery */
-        .gallery-grid {{
+        .gallery-grid {
             display: grid;
             grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
             gap: 15px;
-        }}
+        }
         
-        .gallery-item {{
+        .gallery-item {
             height: 250px;
             overflow: hidden;
             border-radius: 4px;
-        }}
+        }
         
-        .gallery-item img {{
+        .gallery-item img {
             width: 100%;
             height: 100%;
             object-fit: cover;
             transition: transform 0.5s;
-        }}
+        }
         
-        .gallery-item:hover img {{ transform: scale(1.1); }}
+        .gallery-item:hover img { transform: scale(1.1); }
 
         /* Footer */
-        footer {{
+        footer {
             background: var(--primary);
             color: white;
             text-align: center;
             padding: 30px;
             margin-top: 50px;
-        }}
+        }
 
         /* Responsive */
-        @media (max-width: 768px) {{
-            .hero h1 {{ font-size: 2.5rem; }}
-            .about-content {{ flex-direction: column; }}
-            .about-image {{ box-shadow: 10px 10px 0 var(--accent); }}
-        }}
-    </style>
+        @media (max-width: 768px) {
+            .hero h1 { font-size: 2.5rem; }
+            .about-content { flex-direction: column; }
+            .about-image { box-shadow: 10px 10px 0 var(--accent); }
+        }
+$extra_css    </style>
 </head>
 <body>
 
     <!-- Hero -->
     <header class="hero">
-        <div>
-            <h1>{project_name}</h1>
+$hero_media        <div>
+            <h1>$project_name</h1>
             <p style="font-size: 1.2rem;">اكتشف الفخامة في قلب الطبيعة</p>
         </div>
         <div class="hero-scroll">⬇</div>
@@ -200,44 +194,480 @@ def generate_landing_page(data):
         <h2 class="section-title">عن المشروع</h2>
         <div class="about-content">
             <div class="about-text">
-                {desc_html}
+                $desc_html
             </div>
             <div class="about-image">
-                <img src="{gallery_rel[1] if len(gallery_rel) > 1 else hero_bg}" alt="Project View">
+                <img src="$about_img"$about_img_attrs alt="Project View">
             </div>
         </div>
     </section>
 
     <!-- Master Plan -->
-    {f'''
-    <section class="master-plan">
-        <div class="container mp-container">
-            <h2 class="section-title">المخطط العام (Master Plan)</h2>
-            <img src="{mp_rel}" alt="Master Plan">
-        </div>
-    </section>
-    ''' if mp_rel else ''}
+    $master_plan_section
 
     <!-- Gallery -->
     <section class="container">
         <h2 class="section-title">معرض الصور</h2>
         <div class="gallery-grid">
-            {''.join([f'<div class="gallery-item"><img src="{img}" loading="lazy"></div>' for img in gallery_rel])}
+            $gallery_html
         </div>
     </section>
 
     <footer>
-        <p>&copy; 2024 {project_name}. All rights reserved.</p>
+        <p>&copy; 2024 $project_name. All rights reserved.</p>
     </footer>
 
 </body>
 </html>
+""")
+
+MASTER_PLAN_TEMPLATE = string.Template("""
+    <section class="master-plan">
+        <div class="container mp-container">
+            <h2 class="section-title">المخطط العام (Master Plan)</h2>
+            <a href="$mp_rel"><img src="$mp_src"$mp_attrs alt="Master Plan"></a>
+        </div>
+    </section>
+    """)
+
+# Online mode loads the font from Google Fonts
+FONT_LINK = '<link href="https://fonts.googleapis.com/css2?family=Cairo:wght@300;400;600;700&display=swap" rel="stylesheet">'
+
+# Offline mode: the hero is a real <img> (sized, srcset, preloaded) under the same dark overlay
+OFFLINE_CSS = """        body { font-family: 'Cairo', system-ui, -apple-system, 'Segoe UI', Tahoma, Arial, sans-serif; }
+        .hero { isolation: isolate; }
+        .hero-media { position: absolute; inset: 0; width: 100%; height: 100%; object-fit: cover; z-index: -2; }
+        .hero::after { content: ''; position: absolute; inset: 0; background: rgba(0,0,0,0.4); z-index: -1; }
+        .about-image img, .mp-container img { height: auto; }
 """
+
+def image_src(data, filename, variant):
+    """
+    Relative src for an image: its resized variant (see image_pipeline) when one was
+    generated, otherwise the original file.
+    """
+    info = (data.get("Image Variants") or {}).get(filename)
+    if info and variant in info["variants"]:
+        return info["variants"][variant]["path"]
+    return filename
+
+def image_srcset(data, filename):
+    """srcset listing every variant of an image by width, or "" without variants."""
+    info = (data.get("Image Variants") or {}).get(filename)
+    if not info:
+        return ""
+    # Small originals give several variants of the same width; list each width once
+    by_width = {}
+    for variant in info["variants"].values():
+        by_width.setdefault(variant["width"], variant["path"])
+    return ", ".join(f"{path} {width}w" for width, path in sorted(by_width.items()))
+
+def image_size_attrs(data, filename, variant):
+    """' width=".." height=".."' of the image served for `variant`, or "" when unknown."""
+    info = (data.get("Image Variants") or {}).get(filename)
+    if not info:
+        return ""
+    size = info["variants"].get(variant, info)
+    return f' width="{size["width"]}" height="{size["height"]}"'
+
+def gallery_tile(data, filename, sized=False):
+    srcset = image_srcset(data, filename)
+    srcset_attr = f' srcset="{srcset}" sizes="{GALLERY_SIZES}"' if srcset else ""
+    size_attrs = image_size_attrs(data, filename, "thumb") if sized else ""
+    return f'<div class="gallery-item"><img src="{image_src(data, filename, "thumb")}"{srcset_attr}{size_attrs} loading="lazy"></div>'
+
+def read_description(data):
+    description = data.get("Description")
+    if description is None and data.get("Description Path"):
+        # The scraper keeps descriptions on disk rather than in its returned records
+        with open(data["Description Path"], "r", encoding="utf-8") as f:
+            description = f.read()
+    return description
+
+def render_landing_page(data, description=None, offline=False, font_css=None):
+    """
+    Renders the landing page HTML for a project record.
+
+    offline: Self-contained page: no external requests, hero as a preloaded, sized <img>,
+        every image sized. font_css holds the self-hosted @font-face rules (None: system fonts).
+    """
+    project_name = data.get("Project Name", "Real Estate Project")
+    if description is None:
+        description = read_description(data)
+    description_lines = description.split('\n') if description else []
     
+    # Format description (take first 2 paragraphs as lead, rest as details)
+    desc_html = ""
+    for line in description_lines[:20]: # Limit for main view
+        if line.strip():
+            desc_html += f"<p>{line}</p>"
+
+    master_plan_path = data.get("Master Plan Path")
+    gallery_paths = data.get("Gallery Paths", [])
+    
+    # Relative paths for HTML
+    mp_rel = os.path.basename(master_plan_path) if master_plan_path else ""
+    gallery_rel = [os.path.basename(p) for p in gallery_paths]
+
+    # Hero Image (use first gallery image or generic)
+    hero_bg = image_src(data, gallery_rel[0], "large") if gallery_rel else ""
+    about_img = image_src(data, gallery_rel[1], "medium") if len(gallery_rel) > 1 else hero_bg
+    if len(gallery_rel) > 1:
+        about_name, about_variant = gallery_rel[1], "medium"
+    else:
+        about_name, about_variant = (gallery_rel[0] if gallery_rel else ""), "large"
+
+    if offline:
+        head_assets = f"<style>\n{font_css}</style>" if font_css else ""
+        hero_background = "var(--primary)"
+        hero_media = ""
+        if hero_bg:
+            srcset = image_srcset(data, gallery_rel[0])
+            srcset_attrs = f' srcset="{srcset}" sizes="100vw"' if srcset else ""
+            preload_srcset = f' imagesrcset="{srcset}" imagesizes="100vw"' if srcset else ""
+            head_assets += f'\n    <link rel="preload" as="image" href="{hero_bg}"{preload_srcset} fetchpriority="high">'
+            hero_media = (f'        <img class="hero-media" src="{hero_bg}"{srcset_attrs}'
+                          f'{image_size_attrs(data, gallery_rel[0], "large")} alt="" fetchpriority="high">\n')
+        extra_css = OFFLINE_CSS
+        about_img_attrs = image_size_attrs(data, about_name, about_variant) if about_name else ""
+    else:
+        head_assets = FONT_LINK
+        hero_background = f"linear-gradient(rgba(0,0,0,0.4), rgba(0,0,0,0.4)), url('{hero_bg}') no-repeat center center/cover"
+        hero_media = extra_css = about_img_attrs = ""
+
+    master_plan_section = ""
+    if mp_rel:
+        # The master plan links to the full-resolution original for zooming
+        master_plan_section = MASTER_PLAN_TEMPLATE.substitute(
+            mp_rel=mp_rel,
+            mp_src=image_src(data, mp_rel, "large"),
+            mp_attrs=image_size_attrs(data, mp_rel, "large") if offline else "",
+        )
+
+    return PAGE_TEMPLATE.substitute(
+        project_name=project_name,
+        head_assets=head_assets,
+        hero_background=hero_background,
+        extra_css=extra_css,
+        hero_media=hero_media,
+        desc_html=desc_html,
+        about_img=about_img,
+        about_img_attrs=about_img_attrs,
+        master_plan_section=master_plan_section,
+        gallery_html=''.join([gallery_tile(data, img, sized=offline) for img in gallery_rel]),
+    )
+
+def page_image_srcs(page_html):
+    """Local image files a rendered page references by src (what a browser fetches up front)."""
+    return [src for src in re.findall(r'<img[^>]*?\ssrc="([^"]+)"', page_html) + re.findall(r"url\('([^']+)'\)", page_html)
+            if src and "://" not in src]
+
+def render_offline_page(data, description):
+    """
+    Offline page and its font files: the page is rendered once to find the characters it
+    displays, then again with the matching self-hosted font subset.
+    """
+    output_dir = data.get("Output Dir")
+    draft = render_landing_page(data, description, offline=True)
+    font_css, font_files = offline_assets.self_host_fonts(output_dir, offline_assets.subset_text(draft))
+    if font_css is None:
+        return draft, []
+    return render_landing_page(data, description, offline=True, font_css=font_css), font_files
+
+def page_inputs_hash(data, description, offline=False):
+    """
+    Hash of everything a page is rendered from: template version, output mode, project
+    name, description, and the image manifest (each image's size and mtime, plus its variants).
+    """
+    images = []
+    for path in [data.get("Master Plan Path")] + list(data.get("Gallery Paths") or []):
+        if path:
+            try:
+                st = os.stat(path)
+                images.append([os.path.basename(path), st.st_size, st.st_mtime_ns])
+            except OSError:
+                images.append([os.path.basename(path), None, None])
+    inputs = {
+        "template": TEMPLATE_VERSION,
+        "offline": offline,
+        "name": data.get("Project Name"),
+        "description": description,
+        "images": images,
+        "variants": data.get("Image Variants"),
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def write_page(output_dir, html_content, inputs_hash):
     # Write to index.html in output directory
     output_path = os.path.join(output_dir, "index.html")
     with open(output_path, "w", encoding="utf-8") as f:
         f.write(html_content)
+    # Recorded after the page, so an interrupted write is rebuilt next time.
+    # No hash (None) leaves the page to be rebuilt on the next run as well.
+    hash_path = os.path.join(output_dir, PAGE_HASH_FILENAME)
+    if inputs_hash is None:
+        if os.path.exists(hash_path):
+            os.remove(hash_path)
+    else:
+        with open(hash_path, "w", encoding="utf-8") as f:
+            f.write(inputs_hash)
+    return output_path
+
+def render_page(data, description, offline=False, budget=None, strict=False):
+    """
+    Page HTML in the requested mode. Offline pages are weighed (page, fonts, images by src)
+    against `budget` bytes (default offline_assets.DEFAULT_PAGE_BUDGET): over budget is a
+    warning, or a PageBudgetError with strict, raised before anything is written.
+
+    Returns:
+        (html, final): final is False when an offline page fell back to system fonts, so
+        it is not recorded as up to date and picks up the font subset once it can be fetched.
+    """
+    if not offline:
+        return render_landing_page(data, description), True
+
+    output_dir = data.get("Output Dir")
+    html_content, font_files = render_offline_page(data, description)
+    weights = offline_assets.page_weight(output_dir, html_content, font_files, page_image_srcs(html_content))
+    offline_assets.check_budget(weights, budget or offline_assets.DEFAULT_PAGE_BUDGET, strict,
+                                label=f"Page for {data.get('Project Name', output_dir)}")
+    return html_content, bool(font_files)
+
+def generate_landing_page(data, offline=False, budget=None, strict=False):
+    """
+    Generates a single-page HTML landing page for the project.
+    data: Dictionary containing project details from the scraper.
+    offline: Self-contained output (see render_landing_page) checked against `budget` bytes.
+    """
+    description = read_description(data)
+    html_content, final = render_page(data, description, offline, budget, strict)
+    inputs_hash = page_inputs_hash(data, description, offline) if final else None
+    output_path = write_page(data.get("Output Dir"), html_content, inputs_hash)
     
     print(f"Landing page generated: {output_path}")
     return output_path
+
+def build_page(data, force=False, offline=False, budget=None, strict=False):
+    """
+    Renders one project's page unless its inputs are unchanged since the last render.
+
+    Returns:
+        (project output dir, "generated" | "unchanged" | "failed")
+    """
+    output_dir = data.get("Output Dir")
+    try:
+        description = read_description(data)
+        inputs_hash = page_inputs_hash(data, description, offline)
+        hash_path = os.path.join(output_dir, PAGE_HASH_FILENAME)
+        if not force and os.path.exists(os.path.join(output_dir, "index.html")) and os.path.exists(hash_path):
+            with open(hash_path, "r", encoding="utf-8") as f:
+                if f.read().strip() == inputs_hash:
+                    return output_dir, "unchanged"
+        html_content, final = render_page(data, description, offline, budget, strict)
+        write_page(output_dir, html_content, inputs_hash if final else None)
+        return output_dir, "generated"
+    except Exception as e:
+        print(f"Failed to generate page for {output_dir}: {e}")
+        return output_dir, "failed"
+
+def generate_catalog(records, max_workers=None, force=False, offline=False, budget=None, strict=False):
+    """
+    Builds the landing pages of many projects in parallel, skipping unchanged ones.
+
+    records: Scraped project records (e.g. metadata_sink.read_records).
+    force: Rebuild every page regardless of its inputs hash.
+    offline, budget, strict: See generate_landing_page; with strict, pages over budget fail.
+
+    Returns:
+        {"generated": [dir, ...], "unchanged": [...], "failed": [...]}
+    """
+    records = [r for r in records if r.get("Output Dir") and os.path.isdir(r["Output Dir"])]
+    summary = {"generated": [], "unchanged": [], "failed": []}
+    if not records:
+        return summary
+
+    build = partial(build_page, force=force, offline=offline, budget=budget, strict=strict)
+    workers = min(len(records), max_workers or os.cpu_count() or 1)
+    if workers == 1:
+        results = [build(record) for record in records]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Pages are small; batch them so process round-trips don't dominate
+            chunksize = max(1, len(records) // (workers * 4))
+            results = list(pool.map(build, records, chunksize=chunksize))
+
+    for output_dir, status in results:
+        summary[status].append(output_dir)
+    print(f"Catalog: {len(summary['generated'])} pages generated, {len(summary['unchanged'])} unchanged, "
+          f"{len(summary['failed'])} failed")
+    return summary
+
+# Catalog of every generated project: static cards plus a search box backed by the
+# sharded index from search_index. Works from disk and offline (system fonts, no requests
+# beyond the project thumbnails and the shards a query needs).
+CATALOG_TEMPLATE = string.Template("""<!DOCTYPE html>
+<html lang="ar" dir="rtl">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>المشاريع</title>
+    <style>
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body { font-family: system-ui, -apple-system, 'Segoe UI', Tahoma, Arial, sans-serif; color: #333; background: #f5f5f5; }
+        header { background: #1a1a1a; color: white; padding: 30px 20px; text-align: center; }
+        header h1 { font-size: 2rem; margin-bottom: 15px; }
+        #search { width: 100%; max-width: 600px; padding: 12px 16px; font-size: 1.1rem; border: 2px solid #c6a466; border-radius: 4px; }
+        #status { display: block; margin-top: 8px; color: #ccc; font-size: 0.9rem; }
+        .grid { max-width: 1200px; margin: 0 auto; padding: 30px 20px; display: grid; grid-template-columns: repeat(auto-fill, minmax(260px, 1fr)); gap: 20px; }
+        .card { display: flex; flex-direction: column; background: white; border-radius: 4px; overflow: hidden; color: inherit; text-decoration: none; box-shadow: 0 2px 8px rgba(0,0,0,0.08); }
+        .card[hidden] { display: none; }
+        .card img, .card .no-image { width: 100%; height: 180px; object-fit: cover; background: #ddd; }
+        .card strong { padding: 12px 14px 4px; font-size: 1.1rem; color: #1a1a1a; }
+        .card span { padding: 0 14px 14px; font-size: 0.9rem; color: #666; }
+    </style>
+</head>
+<body>
+    <header>
+        <h1>المشاريع</h1>
+        <input id="search" type="search" placeholder="ابحث عن مشروع / Search projects" autocomplete="off">
+        <span id="status">$count</span>
+    </header>
+    <main class="grid" id="catalog">
+$cards
+    </main>
+    <script>
+$script
+    </script>
+</body>
+</html>
+""")
+
+# Mirrors search_index.normalize/tokenize; shards load lazily as <script>s (file:// safe)
+CATALOG_SCRIPT = string.Template(r"""(function () {
+    var SHARDS = $shards;
+    var PREFIX_LEN = $prefix_len, MIN_TOKEN_LEN = $min_token_len;
+    var DIACRITICS = new RegExp($diacritics, 'g');
+    var FOLDS = $folds;
+    var loaded = {}, pending = {};
+    window.catalogShard = function (key, tokens) { loaded[key] = tokens; };
+
+    function normalize(text) {
+        return text.normalize('NFKC').toLowerCase().replace(DIACRITICS, '').replace(/[\u0621-\u064a\u0660-\u0669\u0671\u06f0-\u06f9]/g, function (c) {
+            var code = c.charCodeAt(0);
+            if (code >= 0x660 && code <= 0x669) return String(code - 0x660);
+            if (code >= 0x6f0 && code <= 0x6f9) return String(code - 0x6f0);
+            return FOLDS[c] || c;
+        });
+    }
+
+    function tokenize(text) {
+        return (normalize(text).match(/[\p{L}\p{N}]+/gu) || []).filter(function (t) { return t.length >= MIN_TOKEN_LEN; });
+    }
+
+    function loadShard(key) {
+        if (loaded[key] || !SHARDS[key]) return Promise.resolve(loaded[key] || {});
+        if (!pending[key]) {
+            pending[key] = new Promise(function (resolve) {
+                var script = document.createElement('script');
+                script.src = 'search/' + SHARDS[key];
+                script.onload = script.onerror = function () { resolve(loaded[key] || {}); };
+                document.head.appendChild(script);
+            });
+        }
+        return pending[key];
+    }
+
+    // Doc id -> score for the projects matching every query term (as a prefix), or null for no query
+    function search(query) {
+        var terms = tokenize(query);
+        if (!terms.length) return Promise.resolve(null);
+        return Promise.all(terms.map(function (term) { return loadShard(term.slice(0, PREFIX_LEN)); })).then(function (shards) {
+            var result = null;
+            terms.forEach(function (term, i) {
+                var scores = {};
+                Object.keys(shards[i]).forEach(function (token) {
+                    if (token.indexOf(term) !== 0) return;
+                    var postings = shards[i][token];
+                    for (var j = 0; j < postings.length; j += 2) {
+                        scores[postings[j]] = (scores[postings[j]] || 0) + postings[j + 1];
+                    }
+                });
+                if (result === null) {
+                    result = scores;
+                } else {
+                    var both = {};
+                    Object.keys(result).forEach(function (doc) { if (doc in scores) both[doc] = result[doc] + scores[doc]; });
+                    result = both;
+                }
+            });
+            return result;
+        });
+    }
+
+    var input = document.getElementById('search');
+    var grid = document.getElementById('catalog');
+    var status = document.getElementById('status');
+    var cards = Array.prototype.slice.call(grid.children);
+    var latest = 0;
+
+    input.addEventListener('input', function () {
+        var ticket = ++latest;
+        search(input.value).then(function (scores) {
+            if (ticket !== latest) return;  // A newer query has already been typed
+            var shown = cards;
+            if (scores !== null) {
+                shown = cards.filter(function (card) { return card.dataset.id in scores; })
+                    .sort(function (a, b) { return scores[b.dataset.id] - scores[a.dataset.id]; });
+            }
+            cards.forEach(function (card) { card.hidden = true; });
+            shown.forEach(function (card) { card.hidden = false; grid.appendChild(card); });
+            status.textContent = shown.length + ' / ' + cards.length;
+        });
+    });
+})();""")
+
+def catalog_card(record, doc_id, output_dir, description):
+    rel_dir = os.path.relpath(record["Output Dir"], output_dir).replace(os.sep, "/")
+    gallery = [os.path.basename(p) for p in record.get("Gallery Paths") or []]
+    if gallery:
+        src = f"{rel_dir}/{image_src(record, gallery[0], 'thumb')}"
+        image = f'<img src="{html.escape(src)}"{image_size_attrs(record, gallery[0], "thumb")} alt="" loading="lazy">'
+    else:
+        image = '<div class="no-image"></div>'
+    lead = next((line.strip() for line in (description or "").split("\n") if line.strip()), "")
+    if len(lead) > 120:
+        lead = lead[:120].rsplit(" ", 1)[0] + "…"
+    name = html.escape(record.get("Project Name") or rel_dir)
+    return (f'        <a class="card" href="{html.escape(rel_dir)}/index.html" data-id="{doc_id}">'
+            f'{image}<strong>{name}</strong><span>{html.escape(lead)}</span></a>')
+
+def generate_catalog_index(records, output_dir):
+    """
+    Writes the catalog page (<output_dir>/index.html) linking every project page, and its
+    search index shards (<output_dir>/search/).
+    """
+    records = [r for r in records if r.get("Output Dir") and os.path.isdir(r["Output Dir"])]
+    docs, cards = [], []
+    for doc_id, record in enumerate(records):
+        try:
+            description = read_description(record) or ""
+        except OSError:
+            description = ""
+        docs.append((record.get("Project Name") or "", description))
+        cards.append(catalog_card(record, doc_id, output_dir, description))
+
+    shards = search_index.write_index(search_index.build_index(docs),
+                                      os.path.join(output_dir, search_index.SEARCH_DIRNAME))
+    script = CATALOG_SCRIPT.substitute(
+        shards=json.dumps(shards, ensure_ascii=False),
+        prefix_len=search_index.SHARD_PREFIX_LEN,
+        min_token_len=search_index.MIN_TOKEN_LEN,
+        diacritics=json.dumps(search_index.DIACRITICS.pattern),
+        folds=json.dumps(search_index.LETTER_FOLDS, ensure_ascii=False),
+    )
+    output_path = os.path.join(output_dir, search_index.CATALOG_FILENAME)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(CATALOG_TEMPLATE.substitute(count=len(records), cards="\n".join(cards), script=script))
+
+    print(f"Catalog page generated: {output_path} ({len(records)} projects, {len(shards)} search shards)")
+    return output_path
@@ -1,119 +1,306 @@
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import io
+import multiprocessing
 import os
+import threading
+import time
+import zipfile
 
-def process_excel_file(input_path, output_dir_or_path):
+# 1. Column Mapping Logic
+MAPPING_RULES = {
+    'code': ['Unit Id', 'Unit ID', 'unit id'],
+    'sale_type': ['Sale Type', 'Sale', 'sale type', 'sale'],
+    'size': ['BU area', 'BU Area', 'bu area'],
+    'beds_no': ['Beds', 'beds'],
+    'baths_no': ['Baths', 'baths'],
+    'Floor Number': ['Floor Number', 'floor', 'Floor'],
+    'badget': ['Price 1', 'price 1', 'Price1']
+}
+
+# Project Column Candidates
+PROJECT_COL_CANDIDATES = ['Project', 'Project Name', 'project', 'project name', 'Project name']
+
+# Bucket for rows with a missing project or size, so they are never dropped
+UNASSIGNED = "Unassigned"
+
+# Multi-sheet workbooks smaller than this are parsed in-process: for typical developer
+# sheets, starting worker processes (each importing pandas) costs more than the parse
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+# Sheet-reader pools, one per worker count, started on first use and kept for later calls
+_pools = {}
+_pools_lock = threading.Lock()
+
+def record_stage(timings, stage, start):
+    """Adds the time since start to timings[stage] (no-op when timings is None)."""
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - start)
+
+def find_col(candidates, dataframe):
+    for cand in candidates:
+        if cand in dataframe.columns:
+            return cand
+    return None
+
+def sanitize_name(value):
+    return "".join([c for c in str(value) if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
+
+def format_key(value):
+    """Formats a group key for a file name (120.0 -> "120", so names do not pick up the float's dot)."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def encode_key(series):
+    """Categorical encoding of a grouping column; missing values go to the UNASSIGNED bucket."""
+    key = series.astype('category')
+    if key.isna().any():
+        if UNASSIGNED not in key.cat.categories:
+            key = key.cat.add_categories([UNASSIGNED])
+        key = key.fillna(UNASSIGNED)
+    return key
+
+def partition_rows(df, key_cols):
+    """
+    Partitions the rows of df by key_cols in one pass over categorical codes.
+
+    Returns:
+        dict: key tuple -> array of row positions, ordered by key.
+    """
+    keys = [encode_key(df[col]) for col in key_cols]
+    grouped = df.groupby(keys, observed=True, sort=True)
+    return {key if isinstance(key, tuple) else (key,): positions
+            for key, positions in grouped.indices.items()}
+
+def source_label(source_name):
+    """Original file name without extension (and without the server's 'temp_' prefix)."""
+    name_no_ext = os.path.splitext(os.path.basename(source_name))[0]
+    # remove 'temp_' prefix if present for cleaner name
+    if name_no_ext.startswith('temp_'):
+        name_no_ext = name_no_ext[5:]
+    return name_no_ext
+
+def mapped_frame(df, source_name):
+    """
+    Returns the mapped columns of a sheet under their target names plus a 'project' column.
+    Sheets without a project column use the source file name as the project.
+    """
+    out = pd.DataFrame(index=df.index)
+    for target_name, candidates in MAPPING_RULES.items():
+        found = find_col(candidates, df)
+        out[target_name] = df[found] if found else None
+
+    found_project_col = find_col(PROJECT_COL_CANDIDATES, df)
+    if found_project_col:
+        out['project'] = df[found_project_col].astype(object).where(df[found_project_col].notna(), UNASSIGNED)
+    else:
+        out['project'] = source_label(source_name)
+    return out
+
+def canonical_sheet(df, sheet_name):
     """
-    Reads an Excel file, splits by Project, filters columns, renames them, and saves.
-    
+    Maps one sheet's own headers onto the first alias of each mapped column (and 'Project'),
+    so sheets that spell their headers differently can be merged into one frame.
+
+    Returns:
+        DataFrame, or None if the sheet has none of the mapped columns.
+    """
+    rename_dict = {}
+    for candidates in MAPPING_RULES.values():
+        found = find_col(candidates, df)
+        if found:
+            rename_dict[found] = candidates[0]
+    if not rename_dict:
+        return None
+
+    canonical_project_col = PROJECT_COL_CANDIDATES[0]
+    found_project_col = find_col(PROJECT_COL_CANDIDATES, df)
+    if found_project_col:
+        rename_dict[found_project_col] = canonical_project_col
+    return df[list(rename_dict.keys())].rename(columns=rename_dict)
+
+def read_sheet(source, sheet_name):
+    """Worker: parses a single sheet and maps its headers (see canonical_sheet)."""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return canonical_sheet(pd.read_excel(source, sheet_name=sheet_name), sheet_name)
+
+def sheet_pool(workers):
+    """
+    Long-lived process pool for read_sheet. Workers are spawned, not forked: this runs
+    inside the threaded server and Drive worker threads.
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pools[workers] = pool
+        return pool
+
+def read_workbook(source, max_workers=None):
+    """
+    Reads a workbook for splitting.
+
+    A single-sheet workbook is read as-is. With several sheets, each sheet is parsed
+    in its own worker process with its own header mapping, sheets with none of the
+    mapped columns are skipped, and the rest are merged into one frame. When more than
+    one sheet is merged, sheets without a project column use the sheet name as the
+    project; a single relevant sheet is treated like a single-sheet workbook (its
+    output is named after the source file). Sheets are parsed in a shared worker pool
+    only for workbooks of at least PARALLEL_MIN_BYTES; smaller ones are parsed in-process.
+
+    source: Path, bytes or file-like object holding the .xlsx workbook.
+    """
+    if hasattr(source, 'read'):
+        source = source.read()
+    if isinstance(source, bytearray):
+        source = bytes(source)
+
+    with pd.ExcelFile(io.BytesIO(source) if isinstance(source, bytes) else source) as xls:
+        sheet_names = xls.sheet_names
+        if len(sheet_names) == 1:
+            return xls.parse(sheet_names[0])
+
+    size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+    workers = min(len(sheet_names), max_workers or os.cpu_count() or 1)
+    if size < PARALLEL_MIN_BYTES:
+        workers = 1
+    print(f"Reading {len(sheet_names)} sheets with {workers} workers")
+    if workers == 1:
+        # Small workbook or no parallelism available: skip the worker round trip
+        frames = [read_sheet(source, name) for name in sheet_names]
+    else:
+        frames = list(sheet_pool(workers).map(read_sheet, [source] * len(sheet_names), sheet_names))
+
+    relevant = [frame for frame in frames if frame is not None]
+    skipped = [name for name, frame in zip(sheet_names, frames) if frame is None]
+    if skipped:
+        print(f"Skipped sheets without mapped columns: {skipped}")
+    if not relevant:
+        raise ValueError("No sheet contains any of the mapped columns")
+    if len(relevant) == 1:
+        return relevant[0]
+
+    canonical_project_col = PROJECT_COL_CANDIDATES[0]
+    for name, frame in zip(sheet_names, frames):
+        if frame is not None and canonical_project_col not in frame.columns:
+            frame[canonical_project_col] = name
+    return pd.concat(relevant, ignore_index=True)
+
+def split_dataframe(df, source_name, timings=None):
+    """
+    Splits a sheet by Project (and Size when present), keeping and renaming the mapped columns.
+
+    source_name: Name used for the output when the sheet has no project column.
+    timings: Optional dict that receives the 'map' and 'group' stage durations in seconds.
+    Returns:
+        list of (name, DataFrame): One entry per output file, name without extension.
+    """
+    start = time.perf_counter()
+
+    # Build rename dict
+    rename_dict = {}
+    for target_name, candidates in MAPPING_RULES.items():
+        found = find_col(candidates, df)
+        if found:
+            rename_dict[found] = target_name
+
+    # Helper to filter and rename a dataframe chunk
+    def prepare_chunk(sub_df, p_name):
+         # Filter cols
+         cols_to_keep = list(rename_dict.keys())
+         chunk_filtered = sub_df[cols_to_keep].copy()
+         chunk_filtered.rename(columns=rename_dict, inplace=True)
+
+         # Sanitize name
+         safe_name = sanitize_name(p_name)
+         if not safe_name: safe_name = "Untitled"
+         return safe_name, chunk_filtered
+
+    chunks = []
+
+    # 2. Identify Projects
+    found_project_col = find_col(PROJECT_COL_CANDIDATES, df)
+    record_stage(timings, 'map', start)
+    start = time.perf_counter()
+
+    if found_project_col:
+        # Check for Size column as well (mapped to 'size')
+        # We need to know which column in the original DF maps to 'size'
+        found_size_col = find_col(MAPPING_RULES['size'], df)
+
+        # Group by Project AND Size, or by Project only if size not found.
+        # Row positions for every group are computed in a single pass.
+        key_cols = [found_project_col, found_size_col] if found_size_col else [found_project_col]
+        groups = partition_rows(df, key_cols)
+        if found_size_col:
+            print(f"Splitting by Project and Size. Found {len(groups)} groups.")
+        else:
+            print(f"Found projects (no size col): {[key[0] for key in groups]}")
+
+        for key, positions in groups.items():
+            sub_df = df.take(positions)
+            # Construct composite name
+            safe_proj = sanitize_name(format_key(key[0]))
+            if not safe_proj: safe_proj = "Untitled"
+
+            if found_size_col:
+                safe_size = sanitize_name(format_key(key[1]))
+                if not safe_size: safe_size = "UnknownSize"
+                chunks.append(prepare_chunk(sub_df, f"{safe_proj} - {safe_size}"))
+            else:
+                chunks.append(prepare_chunk(sub_df, safe_proj))
+    else:
+        # No project column, save as one file
+        # Use original filename or default
+        chunks.append(prepare_chunk(df, source_label(source_name)))
+
+    record_stage(timings, 'group', start)
+    return chunks
+
+def process_excel_file(input_path, output_dir_or_path, timings=None, inventory=None):
+    """
+    Reads an Excel file (every relevant sheet), splits by Project, filters columns, renames them, and saves.
+
+    timings: Optional dict that receives per-stage durations in seconds
+             ('read', 'map', 'group', 'write').
+    inventory: Optional inventory.InventoryStore; the sheet's mapped rows replace
+               any rows previously loaded from a file with the same name.
     Returns:
         (bool, list_of_paths): Success status and list of generated files.
     """
     try:
         print(f"Processing file: {input_path}")
-        df = pd.read_excel(input_path)
-        
-        # 1. Column Mapping Logic
-        mapping_rules = {
-            'code': ['Unit Id', 'Unit ID', 'unit id'],
-            'sale_type': ['Sale Type', 'Sale', 'sale type', 'sale'],
-            'size': ['BU area', 'BU Area', 'bu area'],
-            'beds_no': ['Beds', 'beds'],
-            'baths_no': ['Baths', 'baths'],
-            'Floor Number': ['Floor Number', 'floor', 'Floor'],
-            'badget': ['Price 1', 'price 1', 'Price1']
-        }
-        
-        # Project Column Candidates
-        project_col_candidates = ['Project', 'Project Name', 'project', 'project name', 'Project name']
-        
-        def find_col(candidates, dataframe):
-            for cand in candidates:
-                if cand in dataframe.columns:
-                    return cand
-            return None
-
-        # Build rename dict
-        rename_dict = {}
-        for target_name, candidates in mapping_rules.items():
-            found = find_col(candidates, df)
-            if found:
-                rename_dict[found] = target_name
-
-        # 2. Identify Projects
-        found_project_col = find_col(project_col_candidates, df)
-        
-        # If output directed to a file path (not dir), we might be in single file mode, 
-        # but the requirement is to split. We will assume output_dir_or_path is a directory 
+        start = time.perf_counter()
+        df = read_workbook(input_path)
+        record_stage(timings, 'read', start)
+
+        # If output directed to a file path (not dir), we might be in single file mode,
+        # but the requirement is to split. We will assume output_dir_or_path is a directory
         # or we treat the parent dir as the target.
-        
+
         if os.path.isfile(output_dir_or_path) or output_dir_or_path.endswith('.xlsx'):
              output_dir = os.path.dirname(output_dir_or_path)
         else:
              output_dir = output_dir_or_path
-             
-        generated_files = []
 
-        # Helper to process a dataframe chunk
-        def save_chunk(sub_df, p_name):
-             # Filter cols
-             cols_to_keep = list(rename_dict.keys())
-             chunk_filtered = sub_df[cols_to_keep].copy()
-             chunk_filtered.rename(columns=rename_dict, inplace=True)
-             
-             # Sanitize name
-             safe_name = "".join([c for c in str(p_name) if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
-             if not safe_name: safe_name = "Untitled"
-             
-             filename = f"{safe_name}.xlsx"
-             full_path = os.path.join(output_dir, filename)
-             
-             chunk_filtered.to_excel(full_path, index=False)
-             print(f"Saved: {full_path}")
-             return full_path
-
-        if found_project_col:
-            # Check for Size column as well (mapped to 'size')
-            # We need to know which column in the original DF maps to 'size'
-            found_size_col = None
-            size_candidates = mapping_rules['size']
-            found_size_col = find_col(size_candidates, df)
+        generated_files = []
+        chunks = split_dataframe(df, input_path, timings)
+        start = time.perf_counter()
+        for name, chunk in chunks:
+            full_path = os.path.join(output_dir, f"{name}.xlsx")
+            chunk.to_excel(full_path, index=False)
+            print(f"Saved: {full_path}")
+            generated_files.append(full_path)
+        record_stage(timings, 'write', start)
 
-            if found_size_col:
-                # Group by Project AND Size
-                groups = df.groupby([found_project_col, found_size_col])
-                print(f"Splitting by Project and Size. Found {len(groups)} groups.")
-                
-                for (proj, size_val), sub_df in groups:
-                    # Construct composite name
-                    safe_proj = "".join([c for c in str(proj) if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
-                    safe_size = "".join([c for c in str(size_val) if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
-                    
-                    if not safe_proj: safe_proj = "Untitled"
-                    if not safe_size: safe_size = "UnknownSize"
-                    
-                    composite_name = f"{safe_proj} - {safe_size}"
-                    path = save_chunk(sub_df, composite_name)
-                    generated_files.append(path)
-            else:
-                # Fallback to Project only if size not found
-                unique_projects = df[found_project_col].dropna().unique()
-                print(f"Found projects (no size col): {unique_projects}")
-                
-                for proj in unique_projects:
-                    sub_df = df[df[found_project_col] == proj]
-                    path = save_chunk(sub_df, proj)
-                    generated_files.append(path)
-        else:
-            # No project column, save as one file
-            # Use original filename or default
-            base_name = os.path.basename(input_path)
-            name_no_ext = os.path.splitext(base_name)[0]
-            # remove 'temp_' prefix if present for cleaner name
-            if name_no_ext.startswith('temp_'):
-                name_no_ext = name_no_ext[5:]
-                
-            path = save_chunk(df, name_no_ext)
-            generated_files.append(path)
+        if inventory is not None:
+            # The split files are already written, so an inventory failure is reported, not fatal
+            try:
+                inventory.replace_source(source_label(input_path), mapped_frame(df, input_path))
+            except Exception as e:
+                print(f"Error loading {input_path} into inventory: {e}")
 
         return True, generated_files
 
@@ -121,6 +308,41 @@ def process_excel_file(input_path, output_dir_or_path):
         print(f"Error processing file {input_path}: {e}")
         return False, []
 
+def process_excel_buffer(input_buffer, source_name):
+    """
+    Same as process_excel_file, but reads from and writes to memory instead of disk.
+
+    input_buffer: File-like object (or bytes) holding the .xlsx workbook.
+    source_name: Original file name, used when the sheet has no project column.
+    Returns:
+        (bool, list of (filename, BytesIO)): Success status and the generated workbooks.
+    """
+    try:
+        print(f"Processing buffer: {source_name}")
+        df = read_workbook(input_buffer)
+
+        generated = []
+        for name, chunk in split_dataframe(df, source_name):
+            out = io.BytesIO()
+            chunk.to_excel(out, index=False)
+            out.seek(0)
+            generated.append((f"{name}.xlsx", out))
+
+        return True, generated
+
+    except Exception as e:
+        print(f"Error processing buffer {source_name}: {e}")
+        return False, []
+
+def zip_files(file_paths, zip_path, timings=None):
+    """Zips the generated files (flat, by base name) and returns zip_path."""
+    start = time.perf_counter()
+    with zipfile.ZipFile(zip_path, 'w') as zipf:
+        for file_path in file_paths:
+            zipf.write(file_path, arcname=os.path.basename(file_path))
+    record_stage(timings, 'zip', start)
+    return zip_path
+
 # For testing independently
 if __name__ == "__main__":
     # Create a dummy file for testing
@@ -136,8 +358,18 @@ if __name__ == "__main__":
     }
     df = pd.DataFrame(dummy_data)
     df.to_excel("test_input_split.xlsx", index=False)
-    
+
     # Test passing directory
     os.makedirs("output_files", exist_ok=True)
     success, paths = process_excel_file("test_input_split.xlsx", "output_files")
     print(f"Result paths: {paths}")
+
+    # One data sheet without a project column plus a notes sheet: like a single-sheet
+    # workbook, the output is one file named after the workbook (not per sheet and size)
+    with pd.ExcelWriter("Tierra.xlsx") as writer:
+        pd.DataFrame({'Unit Id': [1, 2], 'BU area': [100, 120], 'Price 1': [1, 2]}).to_excel(writer, sheet_name="Sheet1", index=False)
+        pd.DataFrame({'Remarks': ["Prices include maintenance"]}).to_excel(writer, sheet_name="Notes", index=False)
+    success, paths = process_excel_file("Tierra.xlsx", "output_files")
+    assert success and [os.path.basename(p) for p in paths] == ["Tierra.xlsx"], paths
+    os.remove("Tierra.xlsx")
+    print("Multi-sheet check passed.")
@@ -0,0 +1,169 @@
+import os
+import shutil
+import threading
+import time
+
+
+class OutputSweeper:
+    """
+    Keeps output_files/ under a byte quota and a maximum age.
+
+    Every top-level entry of the root (a split workbook, a zip, a scraped project
+    directory) is one artifact. Artifacts are evicted least-recently-served first.
+    Artifacts held by an in-flight response (see acquire/release) or created within
+    the grace period are never deleted.
+    """
+
+    def __init__(self, root, quota_bytes=0, max_age_seconds=0, interval_seconds=300,
+                 grace_seconds=120, protected=()):
+        self.root = os.path.abspath(root)
+        self.quota_bytes = quota_bytes
+        self.max_age_seconds = max_age_seconds
+        self.interval_seconds = interval_seconds
+        self.grace_seconds = grace_seconds
+        self.protected = set(protected)
+
+        self.last_served = {}  # artifact name -> timestamp of last response
+        self.in_use = {}  # artifact name -> number of in-flight responses
+        self.freed_bytes_total = 0
+        self.evicted_total = 0
+        self.last_sweep = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return bool(self.quota_bytes or self.max_age_seconds)
+
+    def _artifact_name(self, path):
+        """Returns the top-level entry under root that contains path, or None."""
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel.startswith(os.pardir) or rel == os.curdir:
+            return None
+        return rel.split(os.sep)[0]
+
+    def acquire(self, path):
+        """Marks an artifact as served and pins it until release() is called."""
+        name = self._artifact_name(path)
+        if name is None:
+            return
+        with self._lock:
+            self.in_use[name] = self.in_use.get(name, 0) + 1
+            self.last_served[name] = time.time()
+
+    def release(self, path):
+        name = self._artifact_name(path)
+        if name is None:
+            return
+        with self._lock:
+            count = self.in_use.get(name, 0) - 1
+            if count > 0:
+                self.in_use[name] = count
+            else:
+                self.in_use.pop(name, None)
+
+    def _scan(self):
+        """Returns a list of (name, size_bytes, last_used) for every artifact."""
+        artifacts = []
+        for entry in os.scandir(self.root):
+            if entry.name.startswith('.') or entry.name in self.protected:
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    size = 0
+                    newest = entry.stat().st_mtime
+                    for dirpath, _, filenames in os.walk(entry.path):
+                        for fname in filenames:
+                            st = os.stat(os.path.join(dirpath, fname))
+                            size += st.st_size
+                            newest = max(newest, st.st_mtime)
+                else:
+                    st = entry.stat(follow_symlinks=False)
+                    size = st.st_size
+                    newest = st.st_mtime
+            except FileNotFoundError:
+                continue
+            last_used = max(newest, self.last_served.get(entry.name, 0))
+            artifacts.append((entry.name, size, last_used))
+        return artifacts
+
+    def _evict(self, name):
+        """Deletes one artifact unless it is pinned. Must be called with the lock held."""
+        if self.in_use.get(name):
+            return False
+        path = os.path.join(self.root, name)
+        try:
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+        self.last_served.pop(name, None)
+        return True
+
+    def sweep(self):
+        """Runs one eviction pass and returns the number of bytes freed."""
+        if not os.path.isdir(self.root):
+            return 0
+
+        now = time.time()
+        artifacts = sorted(self._scan(), key=lambda a: a[2])  # least recently used first
+        total = sum(size for _, size, _ in artifacts)
+        freed = 0
+        evicted = 0
+
+        with self._lock:
+            for name, size, last_used in artifacts:
+                if now - last_used < self.grace_seconds:
+                    continue
+                expired = self.max_age_seconds and now - last_used > self.max_age_seconds
+                over_quota = self.quota_bytes and total - freed > self.quota_bytes
+                if not (expired or over_quota):
+                    continue
+                if self._evict(name):
+                    freed += size
+                    evicted += 1
+                    print(f"Sweeper: evicted {name} ({size} bytes)")
+
+            self.freed_bytes_total += freed
+            self.evicted_total += evicted
+            self.last_sweep = now
+
+        if evicted:
+            print(f"Sweeper: freed {freed} bytes from {evicted} artifacts")
+        return freed
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Sweeper error: {e}")
+
+    def start(self):
+        if self._thread is not None or not self.enabled:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="kords-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "quota_bytes": self.quota_bytes,
+                "max_age_seconds": self.max_age_seconds,
+                "freed_bytes_total": self.freed_bytes_total,
+                "evicted_total": self.evicted_total,
+                "in_use": sorted(self.in_use),
+                "last_sweep": self.last_sweep,
+            }
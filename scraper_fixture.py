@@ -0,0 +1,307 @@
+"""
+Local fixture site for the scraper: stand-ins for public Nawy compound pages,
+the partners login flow and E-Realty project pages, plus a generated image corpus.
+
+The pages reproduce the DOM structure realty_scraper relies on (selectors, tabs,
+gallery layout), so realty_scraper.run can be driven offline and deterministically.
+Latency (before the first byte) and bandwidth (per response) are configurable.
+
+Usage:
+    python scraper_fixture.py --port 8765 --latency-ms 50 --bandwidth 2000000
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import argparse
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+
+FIXTURE_USERNAME = "01000000000"
+FIXTURE_PASSWORD = "fixture-password"
+SESSION_COOKIE = "fixture_session"
+
+AR_SENTENCES = [
+    "يقع المشروع في موقع متميز بالقرب من أهم المحاور الرئيسية.",
+    "يضم المشروع مساحات خضراء واسعة وبحيرات صناعية.",
+    "تتنوع الوحدات بين الشقق والفيلات والتاون هاوس.",
+    "يوفر المشروع نادياً اجتماعياً ومنطقة تجارية متكاملة.",
+]
+EN_SENTENCES = [
+    "The compound offers a wide range of units with flexible payment plans.",
+    "Residents enjoy landscaped gardens, a clubhouse and round-the-clock security.",
+    "Every unit is delivered fully finished with premium materials.",
+]
+
+
+def make_png(width, height, seed):
+    """Generates a noisy RGB PNG (noise keeps the file close to its raw size, like a photo)."""
+    rng = random.Random(seed)
+    raw = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b"")
+
+
+class ScraperFixture:
+    def __init__(self, host="127.0.0.1", port=0, projects=5, images_per_project=12,
+                 image_size=(800, 600), latency_ms=0, bandwidth=0):
+        """
+        projects: Number of projects listed on E-Realty (and available as public pages).
+        bandwidth: Bytes per second per response (0 = unlimited).
+        """
+        self.projects = projects
+        self.images_per_project = images_per_project
+        self.image_size = image_size
+        self.latency = latency_ms / 1000
+        self.bandwidth = bandwidth
+        self.request_count = 0
+        self.bytes_sent = 0
+        self._images = {}  # seed -> PNG bytes
+        self._lock = threading.Lock()
+
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                fixture._dispatch(self, "GET")
+
+            def do_POST(self):
+                fixture._dispatch(self, "POST")
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    # --- Lifecycle -----------------------------------------------------------
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- URLs for the scraper ------------------------------------------------
+
+    @property
+    def nawy_home(self):
+        return f"{self.base_url}/partners"
+
+    @property
+    def erealty_url(self):
+        return f"{self.base_url}/erealty/"
+
+    def public_url(self, index):
+        # The path contains "nawy.com" so realty_scraper takes its public-page branch
+        return f"{self.base_url}/nawy.com/ar/compound/project-{index}"
+
+    def erealty_project_url(self, index):
+        return f"{self.base_url}/erealty/project/project-{index}"
+
+    # --- Content -------------------------------------------------------------
+
+    @staticmethod
+    def project_name(index):
+        return f"Fixture Project {index}"
+
+    def description(self, index):
+        rng = random.Random(index)
+        lines = [" ".join(rng.choice(AR_SENTENCES) for _ in range(3)) for _ in range(3)]
+        lines += [" ".join(rng.choice(EN_SENTENCES) for _ in range(2)) for _ in range(2)]
+        return lines
+
+    def image_url(self, index, n):
+        return f"{self.base_url}/images/gallery/project-{index}/{n}.png"
+
+    def master_plan_url(self, index):
+        return f"{self.base_url}/images/masterplan/project-{index}.png"
+
+    def image_bytes(self, seed):
+        with self._lock:
+            data = self._images.get(seed)
+        if data is None:
+            data = make_png(self.image_size[0], self.image_size[1], seed)
+            with self._lock:
+                self._images[seed] = data
+        return data
+
+    def _public_page(self, index):
+        name = self.project_name(index)
+        gallery = "".join(f'<img src="{self.image_url(index, n)}" alt="{name} {n}">'
+                          for n in range(1, self.images_per_project + 1))
+        description = "<br>".join(self.description(index))
+        return f"""<!DOCTYPE html>
+<html lang="ar" dir="rtl">
+<head><meta charset="UTF-8"><title>{name} - Nawy</title></head>
+<body>
+<div id="__next"><div>
+    <div class="navbar"><img src="{self.base_url}/static/nawy-logo.svg" alt="Nawy"></div>
+    <div class="search-bar"><input placeholder="ابحث"></div>
+    <div class="breadcrumbs"><a href="/">الرئيسية</a> / <span>{name}</span></div>
+    <div class="title"><h1>{name}</h1></div>
+    <div class="gallery">{gallery}</div>
+    <div id="entity-data">
+        <div id="head">
+            <h2>عن {name}</h2>
+            <div class="description">{description}</div>
+        </div>
+        <ul class="tabs">
+            <li onclick="document.getElementById('plan').style.display='block'">مخطط المشروع</li>
+        </ul>
+        <div id="plan" style="display:none"><img src="{self.master_plan_url(index)}" alt="مخطط المشروع"></div>
+    </div>
+</div></div>
+</body>
+</html>"""
+
+    def _erealty_project_page(self, index):
+        name = self.project_name(index)
+        paragraphs = "".join(f"<p>{line}</p>" for line in self.description(index))
+        gallery = "".join(f'<img src="{self.image_url(index, n)}">' for n in range(1, self.images_per_project + 1))
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>{name}</title></head>
+<body>
+<h1>{name}</h1>
+<div class="MuiStack-root css-5t4gzz">{paragraphs}</div>
+<div class="MuiBox-root css-1ml5yzj">{gallery}</div>
+</body></html>"""
+
+    def _erealty_listing(self):
+        cards = "".join(f'<a class="MuiStack-root css-pgkduz" href="{self.erealty_project_url(i)}">{self.project_name(i)}</a>'
+                        for i in range(1, self.projects + 1))
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>E-Realty</title></head>
+<body><div class="projects">{cards}</div></body></html>"""
+
+    def _login_page(self):
+        return """<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>Nawy Partners</title></head>
+<body>
+<button onclick="document.getElementById('login').style.display='block'">Login</button>
+<div id="login" style="display:none">
+    <input id="phone" placeholder="Enter your Phone number">
+    <input id="password" type="password" placeholder="Enter your password">
+    <button onclick="fetch('/partners/session', {method: 'POST', body: JSON.stringify({
+        username: document.getElementById('phone').value,
+        password: document.getElementById('password').value
+    })}).then(r => { if (r.ok) location.href = '/partners/landing/'; })">Log In</button>
+</div>
+</body></html>"""
+
+    # --- HTTP ----------------------------------------------------------------
+
+    def _send(self, handler, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        # Latency applies before the first byte
+        if self.latency:
+            time.sleep(self.latency)
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+
+        if not self.bandwidth:
+            handler.wfile.write(body)
+        else:
+            step = 16 * 1024
+            for offset in range(0, len(body), step):
+                piece = body[offset:offset + step]
+                handler.wfile.write(piece)
+                time.sleep(len(piece) / self.bandwidth)
+
+        with self._lock:
+            self.request_count += 1
+            self.bytes_sent += len(body)
+
+    def _logged_in(self, handler):
+        return f"{SESSION_COOKIE}=1" in (handler.headers.get("Cookie") or "")
+
+    def _dispatch(self, handler, method):
+        path = urlparse(handler.path).path
+
+        if method == "POST" and path == "/partners/session":
+            length = int(handler.headers.get("Content-Length") or 0)
+            try:
+                creds = json.loads(handler.rfile.read(length) or b"{}")
+            except ValueError:
+                creds = {}
+            if creds.get("username") == FIXTURE_USERNAME and creds.get("password") == FIXTURE_PASSWORD:
+                return self._send(handler, 200, "{}", "application/json",
+                                  {"Set-Cookie": f"{SESSION_COOKIE}=1; Path=/"})
+            return self._send(handler, 401, '{"error": "invalid credentials"}', "application/json")
+
+        if method != "GET":
+            return self._send(handler, 405, "Method not allowed", "text/plain")
+
+        if path in ("/partners", "/partners/"):
+            return self._send(handler, 200, self._login_page())
+        if path.startswith("/partners/landing"):
+            return self._send(handler, 200, "<html><body><h1>Welcome</h1></body></html>")
+
+        if path.startswith("/erealty"):
+            if not self._logged_in(handler):
+                return self._send(handler, 302, "", headers={"Location": "/partners"})
+            if path in ("/erealty", "/erealty/"):
+                return self._send(handler, 200, self._erealty_listing())
+            match = re.fullmatch(r"/erealty/project/project-(\d+)", path)
+            if match and 1 <= int(match.group(1)) <= self.projects:
+                return self._send(handler, 200, self._erealty_project_page(int(match.group(1))))
+
+        match = re.fullmatch(r"/nawy\.com/ar/compound/project-(\d+)", path)
+        if match:
+            return self._send(handler, 200, self._public_page(int(match.group(1))))
+
+        match = re.fullmatch(r"/images/gallery/project-(\d+)/(\d+)\.png", path)
+        if match:
+            seed = int(match.group(1)) * 1000 + int(match.group(2))
+            return self._send(handler, 200, self.image_bytes(seed), "image/png")
+        match = re.fullmatch(r"/images/masterplan/project-(\d+)\.png", path)
+        if match:
+            return self._send(handler, 200, self.image_bytes(-int(match.group(1))), "image/png")
+
+        return self._send(handler, 404, "Not found", "text/plain")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the offline scraper fixture site")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--images", type=int, default=12, help="Gallery images per project")
+    parser.add_argument("--image-size", default="800x600", help="WIDTHxHEIGHT of generated images")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--bandwidth", type=int, default=0, help="Bytes per second per response (0 = unlimited)")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.image_size.split("x"))
+    fixture = ScraperFixture(port=args.port, projects=args.projects, images_per_project=args.images,
+                             image_size=(width, height), latency_ms=args.latency_ms, bandwidth=args.bandwidth)
+    print(f"Fixture site at {fixture.base_url}")
+    print(f"  Login:    {fixture.nawy_home} ({FIXTURE_USERNAME} / {FIXTURE_PASSWORD})")
+    print(f"  E-Realty: {fixture.erealty_url}")
+    print(f"  Public:   {fixture.public_url(1)}")
+    try:
+        fixture.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
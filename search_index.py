@@ -0,0 +1,112 @@
+"""
+Prebuilt, sharded search index for the static project catalog (page_generator.generate_catalog_index).
+
+Project names and descriptions are normalised (NFKC, lowercase; Arabic diacritics and
+tatweel removed, alef/yeh/teh marbuta/hamza forms folded, Arabic-Indic digits to ASCII)
+and split into tokens; Arabic tokens are also indexed without their "ال" prefix.
+Postings are grouped into shards by the first SHARD_PREFIX_LEN characters of each token,
+and each shard is written as a small script the catalog page loads on demand:
+
+    catalogShard("pa", {"palm": [3, 5, 17, 1], ...});   // token -> [doc, score, doc, score, ...]
+
+Scripts rather than JSON, so the catalog also searches when opened straight from disk.
+The page's JavaScript normalises queries with the same rules (see CATALOG_SCRIPT in page_generator).
+"""
+import json
+import os
+import re
+import unicodedata
+
+CATALOG_FILENAME = "index.html"
+SEARCH_DIRNAME = "search"
+
+SHARD_PREFIX_LEN = 2
+MIN_TOKEN_LEN = 2
+NAME_WEIGHT = 5
+DESCRIPTION_WEIGHT = 1
+
+# Arabic marks (harakat, Quranic annotations, superscript alef) and tatweel
+DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+# Letter forms folded together (the catalog page's script folds with the same table)
+LETTER_FOLDS = {
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي", "ؤ": "و", "ة": "ه",
+}
+_ARABIC_FOLDS = str.maketrans({
+    **LETTER_FOLDS,
+    **{chr(0x0660 + d): str(d) for d in range(10)},
+    **{chr(0x06F0 + d): str(d) for d in range(10)},
+})
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKC", text).lower()
+    return DIACRITICS.sub("", text).translate(_ARABIC_FOLDS)
+
+
+def tokenize(text):
+    """Index tokens of a text; a token may repeat."""
+    for token in _TOKEN.findall(normalize(text or "")):
+        if len(token) < MIN_TOKEN_LEN:
+            continue
+        yield token
+        # "الساحل" is also found by "ساحل"
+        if token.startswith("ال") and len(token) - 2 >= MIN_TOKEN_LEN + 1:
+            yield token[2:]
+
+
+def build_index(docs):
+    """
+    docs: [(name, description), ...] in catalog order; the position is the doc id.
+
+    Returns:
+        {token: {doc_id: score}}; a name token scores NAME_WEIGHT, each description
+        occurrence DESCRIPTION_WEIGHT.
+    """
+    index = {}
+    for doc_id, (name, description) in enumerate(docs):
+        for weight, text in ((NAME_WEIGHT, name), (DESCRIPTION_WEIGHT, description)):
+            for token in tokenize(text):
+                postings = index.setdefault(token, {})
+                postings[doc_id] = postings.get(doc_id, 0) + weight
+    return index
+
+
+def shard_key(token):
+    return token[:SHARD_PREFIX_LEN]
+
+
+def shard_filename(key):
+    """ASCII file name for a shard key (keys are usually Arabic)."""
+    return "-".join(f"{ord(c):x}" for c in key) + ".js"
+
+
+def write_index(index, search_dir):
+    """
+    Writes one script per shard into search_dir and removes shards left from earlier builds.
+
+    Returns:
+        {shard key: file name}, for the catalog page.
+    """
+    shards = {}
+    for token in sorted(index):
+        postings = index[token]
+        flat = []
+        for doc_id in sorted(postings):
+            flat += [doc_id, postings[doc_id]]
+        shards.setdefault(shard_key(token), {})[token] = flat
+
+    os.makedirs(search_dir, exist_ok=True)
+    manifest = {}
+    for key, tokens in shards.items():
+        filename = shard_filename(key)
+        payload = json.dumps(tokens, ensure_ascii=False, separators=(",", ":"))
+        with open(os.path.join(search_dir, filename), "w", encoding="utf-8") as f:
+            f.write(f"catalogShard({json.dumps(key, ensure_ascii=False)},{payload});\n")
+        manifest[key] = filename
+
+    for name in os.listdir(search_dir):
+        if name.endswith(".js") and name not in manifest.values():
+            os.remove(os.path.join(search_dir, name))
+    return manifest
@@ -1,15 +1,155 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import time
+
+# Measure how long the server module itself takes to load (cold start)
+_MODULE_LOAD_START = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+import importlib
 import shutil
 import os
+import sys
+import threading
 import zipfile
-from processor import process_excel_file
 from pydantic import BaseModel
-import realty_scraper
-import page_generator
+from retention import OutputSweeper
+import metadata_sink
+import search_index
+from inventory import InventoryStore, INVENTORY_FILENAME
+
+# Heavy modules (pandas via processor, Playwright via async_scraper/realty_scraper)
+# are NOT imported here. They are loaded on first use of the endpoint that needs them,
+# so instances that never scrape never pay for Playwright.
+HEAVY_MODULES = ["processor", "async_scraper"]
+
+# Pages the shared scraper browser drives at once, across all /download-project requests
+SCRAPER_MAX_PAGES = int(os.environ.get("KORDS_SCRAPER_MAX_PAGES", "4"))
+
+# Set KORDS_WARMUP=1 to preload the heavy modules in a background thread after startup
+WARMUP_ENABLED = os.environ.get("KORDS_WARMUP", "0") == "1"
+
+OUTPUT_DIR = os.path.join(os.getcwd(), "output_files")
+
+# Persistent state that must not be swept with output_files
+DATA_DIR = os.environ.get("KORDS_DATA_DIR", os.path.join(os.getcwd(), "data"))
+inventory = InventoryStore(os.path.join(DATA_DIR, INVENTORY_FILENAME))
+
+# Retention for output_files: 0 disables the corresponding limit
+sweeper = OutputSweeper(
+    OUTPUT_DIR,
+    quota_bytes=int(os.environ.get("KORDS_OUTPUT_QUOTA_BYTES", "0")),
+    max_age_seconds=int(os.environ.get("KORDS_OUTPUT_MAX_AGE_SECONDS", "0")),
+    interval_seconds=int(os.environ.get("KORDS_SWEEP_INTERVAL_SECONDS", "300")),
+    # The metadata sink is the source of truth for scraped projects, never evict it;
+    # the catalog page and its search index (generate.py --catalog) live at the top level too
+    protected=[metadata_sink.SINK_FILENAME, search_index.CATALOG_FILENAME, search_index.SEARCH_DIRNAME],
+)
+
+# Shared async scraping engine, created (and its browser launched) on first /download-project
+scraper_engine = None
+
+# Import-time cost per lazily loaded module, in seconds
+IMPORT_TIMINGS = {}
+# One lock per module, so a slow import (e.g. the warm-up loading Playwright) never holds up another
+_import_locks = {}
+_import_locks_guard = threading.Lock()
+
+
+def lazy_import(module_name):
+    """
+    Imports a module on first use and records how long the import took.
+    Blocking: async handlers call it through run_in_threadpool.
+    """
+    # sys.modules holds a module as soon as its import *starts*; only trust imports that finished
+    if module_name in IMPORT_TIMINGS:
+        return sys.modules[module_name]
+
+    with _import_locks_guard:
+        lock = _import_locks.setdefault(module_name, threading.Lock())
+    with lock:
+        # Another thread may have finished the import while we waited
+        if module_name in IMPORT_TIMINGS:
+            return sys.modules[module_name]
+
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        elapsed = time.perf_counter() - start
+        IMPORT_TIMINGS[module_name] = round(elapsed, 4)
+        print(f"Lazy import: {module_name} loaded in {elapsed:.3f}s")
+        return module
+
+
+def warm_up():
+    """Preloads the heavy modules so the first real request does not pay for them."""
+    start = time.perf_counter()
+    for module_name in HEAVY_MODULES:
+        try:
+            lazy_import(module_name)
+        except Exception as e:
+            print(f"Warm-up failed for {module_name}: {e}")
+    print(f"Warm-up finished in {time.perf_counter() - start:.3f}s")
+
+
+async def get_scraper_engine():
+    """Returns the shared scraping engine, (re)launching its browser if needed."""
+    global scraper_engine
+    if scraper_engine is None:
+        async_scraper = await run_in_threadpool(lazy_import, "async_scraper")
+        # Another request may have created the engine while the import ran
+        if scraper_engine is None:
+            # The zip ships the originals and no page is built here, so variants would be
+            # wasted work; generate.py --catalog makes them when it builds the pages
+            scraper_engine = async_scraper.AsyncScraperEngine(max_pages=SCRAPER_MAX_PAGES,
+                                                              generate_variants=False)
+    await scraper_engine.start()
+    return scraper_engine
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    print(f"Server module loaded in {SERVER_LOAD_SECONDS:.3f}s")
+    if WARMUP_ENABLED:
+        threading.Thread(target=warm_up, name="kords-warmup", daemon=True).start()
+    sweeper.start()
+    yield
+    if scraper_engine is not None:
+        await scraper_engine.stop()
+    sweeper.stop()
+
+
+def serve_artifact(path, filename, media_type):
+    """Returns a FileResponse that pins the artifact against eviction until it is sent."""
+    sweeper.acquire(path)
+    return FileResponse(
+        path=path,
+        filename=filename,
+        media_type=media_type,
+        background=BackgroundTask(sweeper.release, path),
+    )
+
+
+def zip_project(output_dir, zip_path):
+    """
+    Zips a scraped project's originals, description and records. WebP variants in
+    derivatives/ (from an earlier CLI scrape or generate.py --catalog) are left out:
+    they are regenerated from the originals and would otherwise roughly double the download.
+    """
+    skip = lazy_import("image_pipeline").DERIVATIVES_DIR
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for root, dirs, files in os.walk(output_dir):
+            if root == output_dir:
+                dirs[:] = [d for d in dirs if d != skip]
+            for name in files:
+                path = os.path.join(root, name)
+                zf.write(path, os.path.relpath(path, output_dir))
+    return zip_path
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Mount static files (HTML, CSS, JS)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -21,7 +161,7 @@ async def read_index():
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
     # Ensure output directory exists
-    output_dir = os.path.join(os.getcwd(), "output_files")
+    output_dir = OUTPUT_DIR
     os.makedirs(output_dir, exist_ok=True)
 
     temp_input = f"temp_{file.filename}"
@@ -37,32 +177,29 @@ async def upload_file(file: UploadFile = File(...)):
         # Process it and save to the FINAL destination folder
         # We pass the directory, and the processor decides the filename based on Project Name
         # Note: we ignore output_full_path calculation from above as processor handles it now
-        success, generated_files = process_excel_file(temp_input, output_dir)
+        processor = await run_in_threadpool(lazy_import, "processor")
+        # Parsing and writing the split files run off the event loop
+        success, generated_files = await run_in_threadpool(
+            processor.process_excel_file, temp_input, output_dir, inventory=inventory)
         
         if success and generated_files:
             if len(generated_files) == 1:
                 # Single file
                 final_path = generated_files[0]
                 filename = os.path.basename(final_path)
-                return FileResponse(
-                    path=final_path, 
-                    filename=filename,
-                    media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                return serve_artifact(
+                    final_path,
+                    filename,
+                    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
                 )
             else:
                 # Multiple files -> Zip them
                 zip_filename = f"processed_projects_{file.filename}.zip"
                 zip_path = os.path.join(output_dir, zip_filename)
                 
-                with zipfile.ZipFile(zip_path, 'w') as zipf:
-                    for file_path in generated_files:
-                        zipf.write(file_path, arcname=os.path.basename(file_path))
+                await run_in_threadpool(processor.zip_files, generated_files, zip_path)
                 
-                return FileResponse(
-                    path=zip_path,
-                    filename=zip_filename,
-                    media_type='application/zip'
-                )
+                return serve_artifact(zip_path, zip_filename, 'application/zip')
 
         else:
             raise HTTPException(status_code=500, detail="Failed to process file")
@@ -78,8 +215,6 @@ async def upload_file(file: UploadFile = File(...)):
 # Background cleanup could be added, but for simplicity in local use, we leave temp files 
 # or clean them on startup.
 
-from starlette.concurrency import run_in_threadpool
-
 class ProjectURL(BaseModel):
     url: str
 
@@ -88,8 +223,9 @@ async def download_project(project: ProjectURL):
     try:
         print(f"Received request to download: {project.url}")
         
-        # 1. Scrape Data (Run Sync Playwright in ThreadPool)
-        data_list = await run_in_threadpool(realty_scraper.run, project.url)
+        # 1. Scrape Data (async Playwright on the server's event loop, shared browser)
+        engine = await get_scraper_engine()
+        data_list = await engine.run(project.url)
         
         if not data_list:
             raise HTTPException(status_code=400, detail="Failed to scrape data from URL. Check if URL is valid.")
@@ -109,17 +245,68 @@ async def download_project(project: ProjectURL):
         zip_path = os.path.join(os.path.dirname(output_dir), zip_filename)
         
         # Create Zip
-        shutil.make_archive(zip_path.replace('.zip', ''), 'zip', output_dir)
+        await run_in_threadpool(zip_project, output_dir, zip_path)
         
         # Return Zip
-        return FileResponse(
-            path=zip_path,
-            filename=zip_filename,
-            media_type='application/zip'
-        )
+        return serve_artifact(zip_path, zip_filename, 'application/zip')
 
     except HTTPException as he:
         raise he
     except Exception as e:
         print(f"Error processing project: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/extracted-projects")
+async def extracted_projects():
+    """Builds extracted_projects.xlsx from the scraped-project metadata sink and returns it."""
+    export_path = await run_in_threadpool(metadata_sink.export_excel, OUTPUT_DIR)
+    if not export_path:
+        raise HTTPException(status_code=404, detail="No scraped projects yet")
+    return serve_artifact(
+        export_path,
+        metadata_sink.EXPORT_FILENAME,
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+
+@app.get("/inventory")
+async def query_inventory(
+    project: str = None,
+    sale_type: str = None,
+    beds: int = None,
+    min_beds: int = None,
+    max_beds: int = None,
+    min_size: float = None,
+    max_size: float = None,
+    min_price: float = None,
+    max_price: float = None,
+    sort: str = "badget",
+    order: str = "asc",
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500),
+):
+    """Filtered, sorted, paginated query over every unit from the processed sheets."""
+    try:
+        return await run_in_threadpool(
+            inventory.query,
+            project=project, sale_type=sale_type, beds=beds, min_beds=min_beds, max_beds=max_beds,
+            min_size=min_size, max_size=max_size, min_price=min_price, max_price=max_price,
+            sort=sort, order=order, page=page, page_size=page_size,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/metrics")
+async def metrics():
+    """Reports cold-start cost: server module load time and per-module lazy import times."""
+    return {
+        "server_load_seconds": round(SERVER_LOAD_SECONDS, 4),
+        "imports": dict(IMPORT_TIMINGS),
+        "pending_imports": [m for m in HEAVY_MODULES if m not in IMPORT_TIMINGS],
+        "output_retention": sweeper.stats(),
+    }
+
+
+SERVER_LOAD_SECONDS = time.perf_counter() - _MODULE_LOAD_START